@@ -29,10 +29,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_ANALYTICS = {
+    "total_broadcasts": 0,
+    "total_sent": 0,
+    "total_failed": 0,
+    "total_cycles": 0,
+    "vouch_successes": 0,
+    "vouch_failures": 0
+}
+
 class EnhancedDatabaseManager:
     def __init__(self):
         self.client = None
         self.db = None
+        # (collection, user_id) -> (docs, expires_at); dropped on every write to that collection
+        self._selection_cache = {}
         self._init_db()  # ðŸš€ CRITICAL FIX: Initialize database connection on creation
         # Initialize collections after database connection
         self.users = self.db.users if self.db is not None else None
@@ -121,6 +132,7 @@ class EnhancedDatabaseManager:
                 ensure_index(self.db.ad_delays, "user_id", unique=True)
                 ensure_index(self.db.broadcast_states, "user_id", unique=True)
                 ensure_index(self.db.target_groups, [("user_id", pymongo.ASCENDING), ("group_id", pymongo.ASCENDING)])
+                ensure_index(self.db.forum_groups, [("user_id", pymongo.ASCENDING), ("group_id", pymongo.ASCENDING)])
                 ensure_index(self.db.analytics, "user_id", unique=True)
                 ensure_index(self.db.broadcast_logs, "user_id")
                 ensure_index(self.db.broadcast_activity, "user_id")
@@ -137,6 +149,7 @@ class EnhancedDatabaseManager:
                 # 🚀 Ensure groups_cache collection has indexes for instant performance
                 ensure_index(self.db.groups_cache, [("user_id", pymongo.ASCENDING), ("group_id", pymongo.ASCENDING)], unique=True)
                 ensure_index(self.db.groups_cache, "user_id")
+                ensure_index(self.db.groups_menu_cache, [("user_id", pymongo.ASCENDING), ("is_forum", pymongo.ASCENDING), ("seq", pymongo.ASCENDING)])
                 
                 logger.info("All database indexes ensured successfully")
                 return
@@ -204,10 +217,11 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to create user {user_id}: {e}")
             raise
 
-    def get_user(self, user_id):
-        """Fetch user data."""
+    def get_user(self, user_id, fields=None):
+        """Fetch user data (only the given fields, if any)."""
         try:
-            user = self.db.users.find_one({"user_id": user_id})
+            projection = {field: 1 for field in fields} if fields else None
+            user = self.db.users.find_one({"user_id": user_id}, projection)
             return user if user else None
         except Exception as e:
             logger.error(f"Failed to get user {user_id}: {e}")
@@ -244,6 +258,21 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to get user state for {user_id}: {e}")
             return ""
 
+    def toggle_user_flag(self, user_id, field, upsert=False):
+        """Atomically invert a boolean field on the user doc and return its new value."""
+        try:
+            user = self.db.users.find_one_and_update(
+                {"user_id": user_id},
+                [{"$set": {field: {"$not": [{"$ifNull": [f"${field}", False]}]}}}],
+                projection={field: 1},
+                upsert=upsert,
+                return_document=pymongo.ReturnDocument.AFTER
+            )
+            return user.get(field, False) if user else False
+        except Exception as e:
+            logger.error(f"Failed to toggle {field} for {user_id}: {e}")
+            raise
+
     def has_vouch_sent(self, user_id):
         """Check if vouch message has been sent for a user."""
         try:
@@ -266,10 +295,11 @@ class EnhancedDatabaseManager:
 
     # ================= ACCOUNT MANAGEMENT =================
 
-    def get_user_accounts(self, user_id):
-        """Fetch all accounts for a user."""
+    def get_user_accounts(self, user_id, fields=None):
+        """Fetch all accounts for a user (only the given fields, if any)."""
         try:
-            return list(self.db.accounts.find({"user_id": user_id}))
+            projection = {field: 1 for field in fields} if fields else None
+            return list(self.db.accounts.find({"user_id": user_id}, projection))
         except Exception as e:
             logger.error(f"Failed to get accounts for {user_id}: {e}")
             return []
@@ -448,17 +478,38 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to get saved messages count for {user_id}: {e}")
             return 3
     
+    def _post_link_view(self, user):
+        return {
+            "post_link": user.get("post_link"),
+            "saved_from_peer": user.get("saved_from_peer"),
+            "saved_msg_id": user.get("saved_msg_id"),
+            "message_source": user.get("message_source", "saved_messages")
+        }
+
+    def set_message_source(self, user_id, message_source, require_post_link=False):
+        """Switch the message source and return the updated post link data in one round trip.
+        Returns None when the user doesn't exist (or has no post link, if required)."""
+        try:
+            query = {"user_id": user_id}
+            if require_post_link:
+                query["post_link"] = {"$nin": [None, ""]}
+            user = self.db.users.find_one_and_update(
+                query,
+                {"$set": {"message_source": message_source}},
+                projection={"post_link": 1, "saved_from_peer": 1, "saved_msg_id": 1, "message_source": 1},
+                return_document=pymongo.ReturnDocument.AFTER
+            )
+            return self._post_link_view(user) if user else None
+        except Exception as e:
+            logger.error(f"Failed to set message source for {user_id}: {e}")
+            return None
+
     def get_user_post_link(self, user_id):
         """Get the post link for forwarding"""
         try:
             user = self.db.users.find_one({"user_id": user_id}, {"post_link": 1, "saved_from_peer": 1, "saved_msg_id": 1, "message_source": 1})
             if user:
-                return {
-                    "post_link": user.get("post_link"),
-                    "saved_from_peer": user.get("saved_from_peer"),
-                    "saved_msg_id": user.get("saved_msg_id"),
-                    "message_source": user.get("message_source", "saved_messages")
-                }
+                return self._post_link_view(user)
             return None
         except Exception as e:
             logger.error(f"Failed to get post link for {user_id}: {e}")
@@ -581,6 +632,103 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to get broadcast mode for {user_id}: {e}")
             return "both"
     
+    # bundle field -> (collection joined on user_id, stages run on the user's docs there)
+    USER_BUNDLE_JOINS = {
+        "running": ("broadcast_states", [{"$project": {"_id": 0, "running": 1}}]),
+        "ad_delay": ("ad_delays", [{"$project": {"_id": 0, "delay": 1}}]),
+        "group_msg_delay": ("group_msg_delays", [{"$project": {"_id": 0, "delay": 1}}]),
+        "cycle_timeout": ("cycle_timeouts", [{"$project": {"_id": 0, "timeout": 1}}]),
+        "accounts": ("accounts", [{"$project": {"user_id": 1, "phone_number": 1, "session_string": 1, "is_active": 1}}]),
+        "active_accounts": ("accounts", [{"$match": {"is_active": True}}, {"$count": "count"}]),
+        "logger_status": ("logger_status", [{"$project": {"_id": 0, "is_active": 1, "is_started": 1}}]),
+        "logger_failures": ("logger_failures", [{"$count": "count"}]),
+        "analytics": ("analytics", [{"$project": {"_id": 0}}])
+    }
+    # bundle field read straight off the user doc -> value when unset
+    USER_BUNDLE_DEFAULTS = {
+        "accounts_limit": 1,
+        "broadcast_mode": "both",
+        "message_source": "saved_messages",
+        "group_counts": None,
+        "group_counts_at": None
+    }
+
+    def _user_bundle_value(self, field, user):
+        """Shape one bundle field like the matching single-value getter would"""
+        docs = user.get(field) or []
+        first = docs[0] if docs else {}
+        if field == "post_link":
+            return self._post_link_view(user)
+        if field == "saved_messages_count":
+            count = user.get("saved_messages_count", 3)
+            return count if count > 0 else 3
+        if field in self.USER_BUNDLE_DEFAULTS:
+            value = user.get(field)
+            return self.USER_BUNDLE_DEFAULTS[field] if value is None else value
+        if field == "running":
+            return first.get("running", False)
+        if field == "ad_delay":
+            return first.get("delay", 300)
+        if field == "group_msg_delay":
+            return first.get("delay", 15)
+        if field == "cycle_timeout":
+            return first.get("timeout", 600)
+        if field == "accounts":
+            return docs
+        if field == "logger_status":
+            is_started = first.get("is_started", first.get("is_active", False))
+            return {"is_started": is_started, "is_active": is_started}
+        if field in ("active_accounts", "logger_failures"):
+            return first.get("count", 0)
+        if field == "analytics":
+            return first or dict(DEFAULT_ANALYTICS)
+        raise KeyError(field)
+
+    def get_user_bundle(self, user_id, fields):
+        """Fetch several per-user values for a handler in one round trip.
+        Supports post_link, saved_messages_count and every USER_BUNDLE_JOINS / USER_BUNDLE_DEFAULTS key;
+        active_accounts and logger_failures are returned as counts."""
+        try:
+            pipeline = [{"$match": {"user_id": user_id}}, {"$limit": 1}]
+            projection = {"_id": 0, "user_id": 1}
+            for field in fields:
+                if field in self.USER_BUNDLE_JOINS:
+                    collection, stages = self.USER_BUNDLE_JOINS[field]
+                    # localField/foreignField matches on the joined collection's user_id index;
+                    # the stages then run on the matched docs only
+                    pipeline.append({
+                        "$lookup": {
+                            "from": collection,
+                            "localField": "user_id",
+                            "foreignField": "user_id",
+                            "pipeline": stages,
+                            "as": field
+                        }
+                    })
+                    projection[field] = 1
+                elif field == "post_link":
+                    projection.update({"post_link": 1, "saved_from_peer": 1, "saved_msg_id": 1, "message_source": 1})
+                else:
+                    projection[field] = 1
+            pipeline.append({"$project": projection})
+            user = next(self.db.users.aggregate(pipeline), None) or {}
+        except Exception as e:
+            logger.error(f"Failed to get user bundle for {user_id}: {e}")
+            user = {}
+        return {field: self._user_bundle_value(field, user) for field in fields}
+    
+    def set_group_counts(self, user_id, counts):
+        """Store the (total_groups, groups_only, forums_only, topics) counts shown in the main menu"""
+        try:
+            self.db.users.update_one(
+                {"user_id": user_id},
+                {"$set": {"group_counts": list(counts), "group_counts_at": datetime.utcnow()}}
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to set group counts for {user_id}: {e}")
+            return False
+    
     def cache_all_groups(self, user_id, groups_data):
         """Cache all groups, forums, and topics for user"""
         try:
@@ -603,6 +751,102 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to cache groups for {user_id}: {e}")
             return False
     
+    def cache_forum_topics(self, user_id, topics):
+        """Cache fetched forum topics, pre-split into forums and topics"""
+        try:
+            forums = {}
+            for topic in topics:
+                forums.setdefault(topic["forum_id"], {"id": topic["forum_id"], "title": topic.get("forum_title")})
+            self.db.users.update_one(
+                {"user_id": user_id},
+                {
+                    "$set": {
+                        "cached_forums": list(forums.values()),
+                        "cached_topics": topics,
+                        "cached_forums_count": len(forums),
+                        "cached_topics_count": len(topics),
+                        "groups_cached_at": datetime.utcnow(),
+                        "updated_at": datetime.utcnow()
+                    }
+                },
+                upsert=True
+            )
+            logger.info(f"Cached {len(topics)} topics from {len(forums)} forums for user {user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to cache forum topics for {user_id}: {e}")
+            return False
+
+    def replace_cached_forum_topics(self, user_id, forum_id, forum_title, topics):
+        """Replace one forum's cached topics in a single atomic update, leaving other forums as they are"""
+        try:
+            def without_forum(field, key):
+                return {"$filter": {
+                    "input": {"$ifNull": [f"${field}", []]},
+                    "cond": {"$ne": [f"$$this.{key}", forum_id]}
+                }}
+            
+            # $literal keeps titles that start with "$" from being read as field paths
+            self.db.users.update_one(
+                {"user_id": user_id},
+                [
+                    {"$set": {
+                        "cached_topics": {"$concatArrays": [
+                            without_forum("cached_topics", "forum_id"), {"$literal": topics}
+                        ]},
+                        "cached_forums": {"$concatArrays": [
+                            without_forum("cached_forums", "id"),
+                            {"$literal": [{"id": forum_id, "title": forum_title}]}
+                        ]},
+                        "updated_at": datetime.utcnow()
+                    }},
+                    {"$set": {
+                        "cached_topics_count": {"$size": "$cached_topics"},
+                        "cached_forums_count": {"$size": "$cached_forums"}
+                    }}
+                ]
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to replace cached topics of forum {forum_id} for {user_id}: {e}")
+            return False
+
+    def get_cached_forum_topics(self, user_id):
+        """Get cached forum topics"""
+        try:
+            user = self.db.users.find_one({"user_id": user_id}, {"cached_topics": 1})
+            return user.get("cached_topics", []) if user else []
+        except Exception as e:
+            logger.error(f"Failed to get cached forum topics for {user_id}: {e}")
+            return []
+
+    def get_cached_forum_title(self, user_id, forum_id):
+        """Get the full title of one cached forum, or None when it is not cached"""
+        try:
+            user = self.db.users.find_one(
+                {"user_id": user_id},
+                {"_id": 0, "cached_forums": {"$elemMatch": {"id": forum_id}}}
+            )
+            forums = user.get("cached_forums", []) if user else []
+            return forums[0].get("title") if forums else None
+        except Exception as e:
+            logger.error(f"Failed to get cached forum title for {user_id}: {e}")
+            return None
+
+    def get_cached_forum_topics_page(self, user_id, skip, limit):
+        """Get one page of cached forum topics and the stored total, without loading the rest"""
+        try:
+            user = self.db.users.find_one(
+                {"user_id": user_id},
+                {"_id": 0, "cached_topics": {"$slice": [skip, limit]}, "cached_topics_count": 1}
+            )
+            if not user:
+                return [], 0
+            return user.get("cached_topics", []), user.get("cached_topics_count", 0)
+        except Exception as e:
+            logger.error(f"Failed to get cached forum topics page for {user_id}: {e}")
+            return [], 0
+
     def get_cached_groups(self, user_id):
         """Get cached groups, forums, and topics"""
         try:
@@ -637,6 +881,8 @@ class EnhancedDatabaseManager:
                         "cached_groups": "",
                         "cached_forums": "",
                         "cached_topics": "",
+                        "cached_forums_count": "",
+                        "cached_topics_count": "",
                         "groups_cached_at": ""
                     }
                 }
@@ -760,12 +1006,49 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to increment broadcast cycle for {user_id}: {e}")
             raise
 
+    # ================= SELECTION READ CACHE =================
+
+    SELECTION_CACHE_TTL = 60
+    SELECTION_CACHE_MAX_ENTRIES = 1000
+
+    def _store_selection_cache(self, key, docs):
+        """Cache docs under key, sweeping expired entries and then the oldest ones when full"""
+        now = time.monotonic()
+        self._selection_cache.pop(key, None)
+        if len(self._selection_cache) >= self.SELECTION_CACHE_MAX_ENTRIES:
+            for stale_key in [k for k, (_, expires_at) in self._selection_cache.items() if expires_at <= now]:
+                del self._selection_cache[stale_key]
+        # Dicts keep insertion order, so the first keys are the oldest entries
+        while len(self._selection_cache) >= self.SELECTION_CACHE_MAX_ENTRIES:
+            del self._selection_cache[next(iter(self._selection_cache))]
+        self._selection_cache[key] = (docs, now + self.SELECTION_CACHE_TTL)
+
+    def _cached_user_docs(self, collection, user_id, loader):
+        """Serve a per-user document list from memory, loading it with loader() on a miss"""
+        key = (collection, user_id)
+        cached = self._selection_cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            docs = cached[0]
+        else:
+            docs = loader()
+            self._store_selection_cache(key, docs)
+        # Callers get their own dicts so edits never leak back into the cache
+        return [dict(doc) for doc in docs]
+
+    def invalidate_selection_cache(self, user_id, *collections):
+        """Drop cached reads for a user after a write (all collections when none given)"""
+        for collection in collections or ("target_groups", "forum_groups", "groups_cache"):
+            self._selection_cache.pop((collection, user_id), None)
+
     # ================= TARGET GROUPS MANAGEMENT =================
 
     def get_target_groups(self, user_id):
         """Fetch user's target groups."""
         try:
-            return list(self.db.target_groups.find({"user_id": user_id}))
+            return self._cached_user_docs(
+                "target_groups", user_id,
+                lambda: list(self.db.target_groups.find({"user_id": user_id}))
+            )
         except Exception as e:
             logger.error(f"Failed to get target groups for {user_id}: {e}")
             return []
@@ -784,17 +1067,134 @@ class EnhancedDatabaseManager:
                 },
                 upsert=True
             )
+            self.invalidate_selection_cache(user_id, "target_groups")
             logger.info(f"Target group {group_name} added for user {user_id}")
         except Exception as e:
             logger.error(f"Failed to add target group for {user_id}: {e}")
             raise
+
+    def _replace_groups(self, collection, user_id, groups, **extra_fields):
+        """Replace a user's selection in one bulk_write (1 round trip instead of 2N)."""
+        now = datetime.utcnow()
+        operations = [pymongo.DeleteMany({"user_id": user_id})]
+        for group in groups:
+            operations.append(pymongo.InsertOne({
+                "user_id": user_id,
+                "group_id": group.get("id"),
+                "group_name": group.get("title", "Unknown"),
+                "is_forum": group.get("is_forum", False),
+                **extra_fields,
+                "created_at": now,
+                "updated_at": now
+            }))
+        result = collection.bulk_write(operations, ordered=True)
+        return result.inserted_count
+
+    def replace_target_groups(self, user_id, groups):
+        """Replace all target groups for a user with the given groups."""
+        try:
+            inserted = self._replace_groups(self.db.target_groups, user_id, groups)
+            self.invalidate_selection_cache(user_id, "target_groups")
+            logger.info(f"Replaced target groups for user {user_id}: {inserted} selected")
+            return inserted
+        except Exception as e:
+            logger.error(f"Failed to replace target groups for {user_id}: {e}")
+            raise
+
+    def bulk_add_target_groups(self, user_id, groups):
+        """Add many target groups for a user in one bulk_write."""
+        try:
+            if not groups:
+                return 0
+            now = datetime.utcnow()
+            operations = [
+                pymongo.UpdateOne(
+                    {"user_id": user_id, "group_id": group.get("id")},
+                    {"$set": {
+                        "group_name": group.get("title", "Unknown"),
+                        "created_at": now,
+                        "updated_at": now
+                    }},
+                    upsert=True
+                )
+                for group in groups
+            ]
+            result = self.db.target_groups.bulk_write(operations, ordered=False)
+            self.invalidate_selection_cache(user_id, "target_groups")
+            logger.info(f"Bulk added {len(groups)} target groups for user {user_id}")
+            return result.upserted_count
+        except Exception as e:
+            logger.error(f"Failed to bulk add target groups for {user_id}: {e}")
+            raise
+
+    def bulk_remove_target_groups(self, user_id, group_ids):
+        """Remove many target groups for a user with one delete_many."""
+        try:
+            if not group_ids:
+                return 0
+            result = self.db.target_groups.delete_many({"user_id": user_id, "group_id": {"$in": list(group_ids)}})
+            self.invalidate_selection_cache(user_id, "target_groups")
+            logger.info(f"Bulk removed {result.deleted_count} target groups for user {user_id}")
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"Failed to bulk remove target groups for {user_id}: {e}")
+            raise
+
+    def clear_target_groups(self, user_id):
+        """Remove every target group of a user with one delete_many."""
+        try:
+            result = self.db.target_groups.delete_many({"user_id": user_id})
+            self.invalidate_selection_cache(user_id, "target_groups")
+            logger.info(f"Cleared {result.deleted_count} target groups for user {user_id}")
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"Failed to clear target groups for {user_id}: {e}")
+            raise
+
+    def _existing_group_ids(self, collection, user_id, group_ids):
+        """Return which of group_ids already have a row in collection, in one indexed query."""
+        docs = collection.find(
+            {"user_id": user_id, "group_id": {"$in": list(group_ids)}},
+            {"_id": 0, "group_id": 1}
+        )
+        return {doc["group_id"] for doc in docs}
+
+    def get_existing_target_group_ids(self, user_id, group_ids):
+        """Return the subset of group_ids already selected as target groups."""
+        try:
+            return self._existing_group_ids(self.db.target_groups, user_id, group_ids)
+        except Exception as e:
+            logger.error(f"Failed to get existing target groups for {user_id}: {e}")
+            raise
+
+    def set_target_groups_forum_flags(self, user_id, forum_flags):
+        """Bulk-set the is_forum flag on target groups from a {group_id: is_forum} map."""
+        try:
+            if not forum_flags:
+                return 0
+            operations = [
+                pymongo.UpdateOne(
+                    {"user_id": user_id, "group_id": group_id},
+                    {"$set": {"is_forum": is_forum}}
+                )
+                for group_id, is_forum in forum_flags.items()
+            ]
+            result = self.db.target_groups.bulk_write(operations, ordered=False)
+            self.invalidate_selection_cache(user_id, "target_groups")
+            return result.modified_count
+        except Exception as e:
+            logger.error(f"Failed to set forum flags for {user_id}: {e}")
+            return 0
     
     # ================= FORUM GROUPS MANAGEMENT =================
     
     def get_forum_groups(self, user_id):
         """Fetch user's forum groups."""
         try:
-            return list(self.db.forum_groups.find({"user_id": user_id}))
+            return self._cached_user_docs(
+                "forum_groups", user_id,
+                lambda: list(self.db.forum_groups.find({"user_id": user_id}))
+            )
         except Exception as e:
             logger.error(f"Failed to get forum groups for {user_id}: {e}")
             return []
@@ -814,15 +1214,85 @@ class EnhancedDatabaseManager:
                 },
                 upsert=True
             )
+            self.invalidate_selection_cache(user_id, "forum_groups")
             logger.info(f"Forum group {group_name} 🔷 added for user {user_id}")
         except Exception as e:
             logger.error(f"Failed to add forum group for {user_id}: {e}")
             raise
-    
+
+    def replace_forum_groups(self, user_id, groups):
+        """Replace all forum groups for a user with the given groups."""
+        try:
+            inserted = self._replace_groups(self.db.forum_groups, user_id, groups, topics=[])
+            self.invalidate_selection_cache(user_id, "forum_groups")
+            logger.info(f"Replaced forum groups for user {user_id}: {inserted} selected")
+            return inserted
+        except Exception as e:
+            logger.error(f"Failed to replace forum groups for {user_id}: {e}")
+            raise
+
+    def bulk_add_forum_groups(self, user_id, forums):
+        """Add many forum groups for a user in one bulk_write (one doc per forum)."""
+        try:
+            if not forums:
+                return 0
+            now = datetime.utcnow()
+            operations = [
+                pymongo.UpdateOne(
+                    {"user_id": user_id, "group_id": forum.get("id")},
+                    {
+                        "$set": {"group_name": forum.get("title", "Unknown"), "updated_at": now},
+                        "$setOnInsert": {"topics": [], "created_at": now}
+                    },
+                    upsert=True
+                )
+                for forum in forums
+            ]
+            result = self.db.forum_groups.bulk_write(operations, ordered=False)
+            self.invalidate_selection_cache(user_id, "forum_groups")
+            logger.info(f"Bulk added {len(forums)} forum groups for user {user_id}")
+            return result.upserted_count
+        except Exception as e:
+            logger.error(f"Failed to bulk add forum groups for {user_id}: {e}")
+            raise
+
+    def get_existing_forum_group_ids(self, user_id, group_ids):
+        """Return the subset of group_ids already selected as forum groups."""
+        try:
+            return self._existing_group_ids(self.db.forum_groups, user_id, group_ids)
+        except Exception as e:
+            logger.error(f"Failed to get existing forum groups for {user_id}: {e}")
+            raise
+
+    def clear_forum_groups(self, user_id):
+        """Remove every forum group of a user with one delete_many."""
+        try:
+            result = self.db.forum_groups.delete_many({"user_id": user_id})
+            self.invalidate_selection_cache(user_id, "forum_groups")
+            logger.info(f"Cleared {result.deleted_count} forum groups for user {user_id}")
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"Failed to clear forum groups for {user_id}: {e}")
+            raise
+
+    def bulk_remove_forum_groups(self, user_id, group_ids):
+        """Remove many forum groups for a user with one delete_many."""
+        try:
+            if not group_ids:
+                return 0
+            result = self.db.forum_groups.delete_many({"user_id": user_id, "group_id": {"$in": list(group_ids)}})
+            self.invalidate_selection_cache(user_id, "forum_groups")
+            logger.info(f"Bulk removed {result.deleted_count} forum groups for user {user_id}")
+            return result.deleted_count
+        except Exception as e:
+            logger.error(f"Failed to bulk remove forum groups for {user_id}: {e}")
+            raise
+
     def remove_forum_group(self, user_id, group_id):
         """Remove a forum group."""
         try:
             result = self.db.forum_groups.delete_one({"user_id": user_id, "group_id": group_id})
+            self.invalidate_selection_cache(user_id, "forum_groups")
             if result.deleted_count > 0:
                 logger.info(f"Forum group {group_id} removed for user {user_id}")
                 return True
@@ -845,24 +1315,10 @@ class EnhancedDatabaseManager:
         """Fetch analytics for a user."""
         try:
             stats = self.db.analytics.find_one({"user_id": user_id})
-            return stats if stats else {
-                "total_broadcasts": 0,
-                "total_sent": 0,
-                "total_failed": 0,
-                "total_cycles": 0,
-                "vouch_successes": 0,
-                "vouch_failures": 0
-            }
+            return stats if stats else dict(DEFAULT_ANALYTICS)
         except Exception as e:
             logger.error(f"Failed to get analytics for {user_id}: {e}")
-            return {
-                "total_broadcasts": 0,
-                "total_sent": 0,
-                "total_failed": 0,
-                "total_cycles": 0,
-                "vouch_successes": 0,
-                "vouch_failures": 0
-            }
+            return dict(DEFAULT_ANALYTICS)
 
     def increment_broadcast_stats(self, user_id, success, group_id=None, account_id=None):
         """Increment broadcast stats for a user, optionally tracking group and account stats."""
@@ -1027,6 +1483,18 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to get logger failures for {user_id}: {e}")
             return []
 
+    def get_logger_failure_summary(self, user_id):
+        """Count a user's logger failures and fetch only the most recent error."""
+        try:
+            count = self.db.logger_failures.count_documents({"user_id": user_id})
+            last = self.db.logger_failures.find_one(
+                {"user_id": user_id}, {"_id": 0, "error": 1}, sort=[("_id", pymongo.DESCENDING)]
+            ) if count else None
+            return {"count": count, "last_error": last.get("error") if last else None}
+        except Exception as e:
+            logger.error(f"Failed to get logger failure summary for {user_id}: {e}")
+            return {"count": 0, "last_error": None}
+
     # ================= USER STATUS MANAGEMENT =================
 
     def get_user_status(self, user_id):
@@ -1454,13 +1922,40 @@ class EnhancedDatabaseManager:
     def get_cached_groups(self, user_id):
         """Get all cached groups for a user from MongoDB - INSTANT retrieval"""
         try:
-            groups = list(self.db.groups_cache.find({"user_id": user_id}))
+            # Only the fields the bot renders; skips _id/user_id/cached_at on every decode
+            groups = self._cached_user_docs("groups_cache", user_id, lambda: list(self.db.groups_cache.find(
+                {"user_id": user_id},
+                {"_id": 0, "group_id": 1, "title": 1, "username": 1, "type": 1, "members_count": 1, "account_phone": 1}
+            )))
             logger.info(f"[CACHE] Retrieved {len(groups)} cached groups for user {user_id}")
             return groups
         except Exception as e:
             logger.error(f"Failed to get cached groups for user {user_id}: {e}")
             return []
     
+    def get_cached_groups_page(self, user_id, skip, limit):
+        """Get one page of cached groups, in insertion order, without loading the rest"""
+        try:
+            docs = self.db.groups_cache.find(
+                {"user_id": user_id},
+                {"_id": 0, "group_id": 1, "title": 1}
+            ).sort("_id", pymongo.ASCENDING).skip(skip).limit(limit)
+            return [{"id": d["group_id"], "title": d.get("title", "Unknown")} for d in docs]
+        except Exception as e:
+            logger.error(f"Failed to get cached groups page for user {user_id}: {e}")
+            return []
+
+    def count_cached_groups(self, user_id, group_ids=None):
+        """Count cached groups for a user, optionally only those in group_ids"""
+        try:
+            query = {"user_id": user_id}
+            if group_ids is not None:
+                query["group_id"] = {"$in": list(group_ids)}
+            return self.db.groups_cache.count_documents(query)
+        except Exception as e:
+            logger.error(f"Failed to count cached groups for user {user_id}: {e}")
+            return 0
+
     def save_groups_to_cache(self, user_id, groups):
         """Save/update groups in MongoDB cache - bulk upsert for performance"""
         try:
@@ -1488,6 +1983,7 @@ class EnhancedDatabaseManager:
             
             if operations:
                 result = self.db.groups_cache.bulk_write(operations, ordered=False)
+                self.invalidate_selection_cache(user_id, "groups_cache")
                 logger.info(f"[CACHE] Saved {len(groups)} groups to cache for user {user_id}")
                 return result.upserted_count + result.modified_count
             return 0
@@ -1500,6 +1996,7 @@ class EnhancedDatabaseManager:
         """Delete all cached groups for a user"""
         try:
             result = self.db.groups_cache.delete_many({"user_id": user_id})
+            self.invalidate_selection_cache(user_id, "groups_cache")
             logger.info(f"[CACHE] Deleted {result.deleted_count} cached groups for user {user_id}")
             return result.deleted_count
         except Exception as e:
@@ -1528,6 +2025,58 @@ class EnhancedDatabaseManager:
             logger.error(f"Failed to refresh groups cache for user {user_id}: {e}")
             return 0
 
+    def save_groups_menu_cache(self, user_id, groups):
+        """Replace the groups menu listing for a user, keeping dialog order in 'seq'"""
+        try:
+            now = datetime.utcnow()
+            operations = [pymongo.DeleteMany({"user_id": user_id})]
+            for seq, group in enumerate(groups):
+                operations.append(pymongo.InsertOne({
+                    "user_id": user_id,
+                    "group_id": group.get("id"),
+                    "title": group.get("title", "Unknown"),
+                    "is_forum": group.get("is_forum", False),
+                    "seq": seq,
+                    "cached_at": now
+                }))
+            self.db.groups_menu_cache.bulk_write(operations, ordered=True)
+            logger.info(f"[CACHE] Saved {len(groups)} groups menu entries for user {user_id}")
+            return len(groups)
+        except Exception as e:
+            logger.error(f"Failed to save groups menu cache for user {user_id}: {e}")
+            return 0
+
+    def has_groups_menu_cache(self, user_id):
+        """Check if the groups menu listing is cached for a user"""
+        try:
+            return self.db.groups_menu_cache.count_documents({"user_id": user_id}, limit=1) > 0
+        except Exception as e:
+            logger.error(f"Failed to check groups menu cache for user {user_id}: {e}")
+            return False
+
+    def get_groups_menu_page(self, user_id, is_forum, skip, limit):
+        """Get one page of the groups menu listing via the (user_id, is_forum, seq) index"""
+        try:
+            docs = self.db.groups_menu_cache.find(
+                {"user_id": user_id, "is_forum": is_forum},
+                {"_id": 0, "group_id": 1, "title": 1, "is_forum": 1}
+            ).sort("seq", pymongo.ASCENDING).skip(skip).limit(limit)
+            return [{"id": d["group_id"], "title": d.get("title", "Unknown"), "is_forum": d.get("is_forum", False)} for d in docs]
+        except Exception as e:
+            logger.error(f"Failed to get groups menu page for user {user_id}: {e}")
+            return []
+
+    def count_groups_menu(self, user_id, is_forum, group_ids=None):
+        """Count cached groups menu entries, optionally only those in group_ids"""
+        try:
+            query = {"user_id": user_id, "is_forum": is_forum}
+            if group_ids is not None:
+                query["group_id"] = {"$in": list(group_ids)}
+            return self.db.groups_menu_cache.count_documents(query)
+        except Exception as e:
+            logger.error(f"Failed to count groups menu cache for user {user_id}: {e}")
+            return 0
+
     def delete_user_fully(self, user_id):
         """
         Delete all data related to a specific user from the database.
@@ -1540,7 +2089,7 @@ class EnhancedDatabaseManager:
                 "ad_delays", "group_msg_delays", "cycle_timeouts",
                 "broadcast_states", "broadcast_logs", "broadcast_activity",
                 "target_groups", "logger_status",
-                "logger_failures", "temp_data", "groups_cache"
+                "logger_failures", "temp_data", "groups_cache", "groups_menu_cache"
             ]
             deleted_total = 0
             for coll in collections:
@@ -1551,6 +2100,7 @@ class EnhancedDatabaseManager:
                     if result.deleted_count > 0:
                         logger.info(f"ðŸ§¹ Deleted {result.deleted_count} from {coll} for user {user_id}")
                         deleted_total += result.deleted_count
+            self.invalidate_selection_cache(user_id)
 
             if deleted_total == 0:
                 logger.info(f"No user data found to delete for user {user_id}")
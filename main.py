@@ -12,7 +12,11 @@ import sys
 import tempfile
 import threading
 import time
-from datetime import datetime, timedelta
+from collections import namedtuple
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta
+from functools import lru_cache, wraps
+from types import SimpleNamespace
 from typing import Dict, Any, List, Tuple, Optional, Union
 from zoneinfo import ZoneInfo
 from cryptography.fernet import Fernet, InvalidToken
@@ -41,6 +45,7 @@ from pyrogram.types import (
     ReplyKeyboardMarkup,
     KeyboardButton,
     ReplyKeyboardRemove,
+    WebAppInfo,
 )
 from pyrogram.errors import (
     UserNotParticipant,
@@ -55,11 +60,96 @@ from database import EnhancedDatabaseManager
 
 IST = ZoneInfo("Asia/Kolkata")
 
+LOGGER_BOT_USERNAME = config.LOGGER_BOT_USERNAME.lstrip('@')
+LOGGER_BOT_URL = f"https://t.me/{LOGGER_BOT_USERNAME}"
+
 def get_ist_now():
     """Get current time in IST timezone"""
     return datetime.now(IST)
 
+# Fire-and-forget tasks; the event loop only keeps weak references, so hold them until done
+BACKGROUND_TASKS = set()
+
+def spawn_background_task(coro):
+    """Schedule coro as a task that is kept alive until it finishes"""
+    task = asyncio.create_task(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(BACKGROUND_TASKS.discard)
+    return task
+
+# phone_number -> (session_string, connected TelegramClient); reused across handlers
+TELEGRAM_CLIENT_POOL = {}
+TELEGRAM_CLIENT_LOCKS = {}
+# phone_number -> monotonic time the pooled client was last handed out
+TELEGRAM_CLIENT_LAST_USED = {}
+TELEGRAM_CLIENT_IDLE_TIMEOUT = 600
+
 async def get_telegram_client(phone_number, session_string):
+    """
+    Get a connected Telegram client for the given account.
+    Clients are pooled per account and reused; callers must not disconnect them.
+    """
+    lock = TELEGRAM_CLIENT_LOCKS.setdefault(phone_number, asyncio.Lock())
+    async with lock:
+        TELEGRAM_CLIENT_LAST_USED[phone_number] = time.monotonic()
+        pooled = TELEGRAM_CLIENT_POOL.get(phone_number)
+        if pooled:
+            pooled_session, pooled_client = pooled
+            if pooled_session == session_string and pooled_client.is_connected():
+                return pooled_client
+            # Session changed (re-login) or connection dropped: replace the pooled client
+            TELEGRAM_CLIENT_POOL.pop(phone_number, None)
+            try:
+                await pooled_client.disconnect()
+            except Exception:
+                pass
+        
+        tg_client = await create_telegram_client(phone_number, session_string)
+        TELEGRAM_CLIENT_POOL[phone_number] = (session_string, tg_client)
+        return tg_client
+
+async def evict_idle_telegram_clients():
+    """Disconnect pooled clients left unused for TELEGRAM_CLIENT_IDLE_TIMEOUT seconds"""
+    while True:
+        await asyncio.sleep(60)
+        cutoff = time.monotonic() - TELEGRAM_CLIENT_IDLE_TIMEOUT
+        idle_phones = [phone for phone, last_used in TELEGRAM_CLIENT_LAST_USED.items() if last_used < cutoff]
+        for phone_number in idle_phones:
+            async with TELEGRAM_CLIENT_LOCKS.setdefault(phone_number, asyncio.Lock()):
+                # Handed out again while waiting for the lock
+                if TELEGRAM_CLIENT_LAST_USED.get(phone_number, cutoff) >= cutoff:
+                    continue
+                TELEGRAM_CLIENT_LAST_USED.pop(phone_number, None)
+                pooled = TELEGRAM_CLIENT_POOL.pop(phone_number, None)
+            if pooled:
+                try:
+                    await pooled[1].disconnect()
+                except Exception as e:
+                    logger.warning(f"Failed to disconnect idle client for {phone_number}: {e}")
+
+async def release_telegram_clients(phone_numbers):
+    """Disconnect and drop the pooled clients of removed accounts so their sessions don't stay live"""
+    for phone_number in phone_numbers:
+        async with TELEGRAM_CLIENT_LOCKS.setdefault(phone_number, asyncio.Lock()):
+            TELEGRAM_CLIENT_LAST_USED.pop(phone_number, None)
+            pooled = TELEGRAM_CLIENT_POOL.pop(phone_number, None)
+        if pooled:
+            try:
+                await pooled[1].disconnect()
+            except Exception as e:
+                logger.warning(f"Failed to disconnect pooled client for {phone_number}: {e}")
+
+async def disconnect_telegram_clients():
+    """Disconnect every pooled Telegram client (bot shutdown)"""
+    for phone_number, (_, tg_client) in list(TELEGRAM_CLIENT_POOL.items()):
+        try:
+            await tg_client.disconnect()
+        except Exception as e:
+            logger.warning(f"Failed to disconnect pooled client for {phone_number}: {e}")
+    TELEGRAM_CLIENT_POOL.clear()
+    TELEGRAM_CLIENT_LAST_USED.clear()
+
+async def create_telegram_client(phone_number, session_string):
     """
     Create and connect a Telegram client for the given account.
     Returns connected TelegramClient instance.
@@ -71,7 +161,7 @@ async def get_telegram_client(phone_number, session_string):
         
         # Decrypt session string
         try:
-            decrypted_session = cipher_suite.decrypt(session_string.encode()).decode()
+            decrypted_session = decrypt_session(session_string)
         except Exception as e:
             raise Exception(f"Failed to decrypt session for {phone_number}: {e}")
         
@@ -137,6 +227,9 @@ def parse_post_link(link: str) -> Optional[Tuple[Union[int, str], int]]:
     
     return None
 
+# The only user fields the schedule checks read
+SCHEDULE_FIELDS = ("schedule_enabled", "schedule_start_time", "schedule_end_time")
+
 def is_within_schedule(user_data: dict) -> Tuple[bool, str]:
     """
     Check if current time is within user's scheduled time range (IST timezone).
@@ -447,6 +540,11 @@ else:
 
 cipher_suite = Fernet(ENCRYPTION_KEY.encode())
 
+@lru_cache(maxsize=512)
+def decrypt_session(session_encrypted):
+    """Decrypt a stored session string; sessions rarely change, so repeats skip the Fernet work"""
+    return cipher_suite.decrypt(session_encrypted.encode()).decode()
+
 # =======================================================
 # 🗄️ DATABASE INITIALIZATION
 # =======================================================
@@ -486,6 +584,7 @@ def ensure_db_methods(db):
                 'user_id': user_id,
                 'group_id': group_id
             })
+            self.invalidate_selection_cache(user_id, "target_groups")
         setattr(db.__class__, 'remove_target_group', remove_target_group)
     
     if not hasattr(db, 'get_target_group'):
@@ -502,8 +601,34 @@ def ensure_db_methods(db):
 # MONGODB GROUPS CACHE SYSTEM
 # ========================================
 
+# uid -> groups for the callback currently being handled; None outside a memo scope
+GROUPS_CACHE_REQUEST_MEMO = ContextVar("groups_cache_request_memo", default=None)
+
+def memoize_groups_cache_per_callback(handler):
+    """Share get_groups_from_mongo_cache results across one callback chain (e.g. select all -> re-render)"""
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        if GROUPS_CACHE_REQUEST_MEMO.get() is not None:
+            return await handler(*args, **kwargs)
+        token = GROUPS_CACHE_REQUEST_MEMO.set({})
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            GROUPS_CACHE_REQUEST_MEMO.reset(token)
+    return wrapper
+
 async def get_groups_from_mongo_cache(uid):
     """INSTANT: Get groups from MongoDB cache"""
+    memo = GROUPS_CACHE_REQUEST_MEMO.get()
+    if memo is not None and uid in memo:
+        return memo[uid]
+    groups = await load_groups_from_mongo_cache(uid)
+    if memo is not None:
+        memo[uid] = groups
+    return groups
+
+async def load_groups_from_mongo_cache(uid):
+    """Read the groups cache, fetching from Telegram when it is empty"""
     try:
         cached_groups = db.get_cached_groups(uid)
         
@@ -540,7 +665,7 @@ async def fetch_and_cache_groups_to_mongo(uid):
         async def fetch_account_groups(acc):
             tg_client = None
             try:
-                session_str = cipher_suite.decrypt(acc['session_string'].encode()).decode()
+                session_str = decrypt_session(acc['session_string'])
                 credentials = db.get_user_api_credentials(acc['user_id'])
                 if not credentials:
                     return []
@@ -609,7 +734,7 @@ async def refresh_mongo_cache(uid):
         async def fetch_account_groups(acc):
             tg_client = None
             try:
-                session_str = cipher_suite.decrypt(acc['session_string'].encode()).decode()
+                session_str = decrypt_session(acc['session_string'])
                 credentials = db.get_user_api_credentials(acc['user_id'])
                 if not credentials:
                     return []
@@ -668,6 +793,8 @@ async def fetch_groups_after_account_add(uid):
     """Fetch ALL groups after adding account and save to cache"""
     try:
         logger.info(f"[CACHE] Fetching all groups after account add for user {uid}")
+        invalidate_user_dialog_caches(uid)
+        spawn_background_task(refresh_menu_group_counts(uid))
         await fetch_and_cache_groups_to_mongo(uid)
         logger.info(f"[CACHE] Groups fetch complete for user {uid}")
     except Exception as e:
@@ -678,6 +805,28 @@ def clear_groups_cache(uid):
     db.delete_groups_cache(uid)
     logger.info(f"[CACHE] Cleared MongoDB cache for user {uid}")
 
+# uid -> (forum_only_mode, expires_at); saves a users lookup per click
+FORUM_MODE_CACHE = {}
+FORUM_MODE_CACHE_TTL = 30
+
+def get_forum_only_mode(uid):
+    """Get user's forum_only_mode flag (cached for FORUM_MODE_CACHE_TTL seconds)"""
+    cached = FORUM_MODE_CACHE.get(uid)
+    if cached:
+        if cached[1] > time.monotonic():
+            return cached[0]
+        FORUM_MODE_CACHE.pop(uid, None)
+    user = db.db.users.find_one({"user_id": uid}, {"forum_only_mode": 1})
+    forum_only_mode = user.get("forum_only_mode", False) if user else False
+    FORUM_MODE_CACHE[uid] = (forum_only_mode, time.monotonic() + FORUM_MODE_CACHE_TTL)
+    return forum_only_mode
+
+def toggle_forum_only_mode(uid):
+    """Flip user's forum_only_mode flag in one atomic write and refresh the cache"""
+    forum_only_mode = db.toggle_user_flag(uid, "forum_only_mode", upsert=True)
+    FORUM_MODE_CACHE[uid] = (forum_only_mode, time.monotonic() + FORUM_MODE_CACHE_TTL)
+    return forum_only_mode
+
 async def auto_select_all_groups(uid, phone):
     """Auto-select all groups for a newly added account"""
     try:
@@ -695,7 +844,7 @@ async def auto_select_all_groups(uid, phone):
             return
         
         try:
-            session_str = cipher_suite.decrypt(new_account['session_string'].encode()).decode()
+            session_str = decrypt_session(new_account['session_string'])
             
             credentials = db.get_user_api_credentials(uid)
             
@@ -781,6 +930,15 @@ def kb(rows):
         raise ValueError("Rows must be a list of lists")
     return InlineKeyboardMarkup(rows)
 
+# Static markups shared by many screens; built once instead of on every callback
+BACK_TO_MAIN_MARKUP = kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+
+def callback_data_filter(*values):
+    """Match callbacks whose data is exactly one of values, by set lookup instead of a regex scan"""
+    async def func(flt, _, callback_query):
+        return callback_query.data in flt.values
+    return filters.create(func, "CallbackDataFilter", values=frozenset(values))
+
 try:
     asyncio.get_running_loop()
 except RuntimeError:
@@ -977,6 +1135,42 @@ async def preload_chat_cache(client):
         logger.warning(f" Chat cache preload failed: {e}")
 
 user_tasks = {}
+# uids with a start in progress, from the "not running" check to task creation; a second
+# tap is turned away instead of waiting, since the start may sit in cancel_broadcast_task
+BROADCAST_STARTING = set()
+BROADCAST_CANCEL_TIMEOUT = 5
+
+def track_broadcast_task(uid, task):
+    """Register a user's broadcast task; it removes itself from user_tasks once finished"""
+    user_tasks[uid] = task
+    task.add_done_callback(lambda done: user_tasks.pop(uid, None) if user_tasks.get(uid) is done else None)
+
+def owns_broadcast_state(uid):
+    """
+    True unless a newer broadcast task has replaced the calling one.
+    A task that outlived cancel_broadcast_task's timeout must not reset the new task's state.
+    """
+    task = user_tasks.get(uid)
+    return task is None or task is asyncio.current_task()
+
+async def cancel_broadcast_task(uid):
+    """
+    Cancel a user's broadcast task, waiting at most BROADCAST_CANCEL_TIMEOUT seconds.
+    Returns False if no task was registered.
+    """
+    task = user_tasks.pop(uid, None)
+    if not task:
+        return False
+    task.cancel()
+    # asyncio.wait never re-cancels or raises, so a task stuck in Telegram I/O can't hang the caller
+    await asyncio.wait({task}, timeout=BROADCAST_CANCEL_TIMEOUT)
+    if not task.done():
+        logger.warning(f"Broadcast task for {uid} did not stop within {BROADCAST_CANCEL_TIMEOUT}s")
+    elif not task.cancelled() and task.exception():
+        logger.error(f"Broadcast task for {uid} failed: {task.exception()}")
+    else:
+        logger.info(f"Cancelled broadcast task for {uid}")
+    return True
 
 # =======================================================
 # 🛠️ HELPER FUNCTIONS (Per-User Logger System)
@@ -1042,12 +1236,11 @@ async def instant_join_check(bot_client, user_id, chat_username):
         logger.error(f"Instant join check failed for user {user_id} in @{chat_username}: {e}")
         return False
 
-async def verify_all_joins(bot_client, user_id, channel_username, group_username):
+async def check_all_joins(bot_client, user_id, channel_username, group_username):
     """
-    Verify user has joined both channel and group using bot's Telethon client.
+    Check channel and group membership concurrently using bot's Telethon client.
     Bot must be admin in both channel and group.
-    Uses usernames instead of IDs - cleaner and more flexible.
-    Returns True only if user is in BOTH.
+    Returns (channel_joined, group_joined).
     """
     try:
         logger.info(f"🔍 Starting instant verification for user {user_id}")
@@ -1064,11 +1257,19 @@ async def verify_all_joins(bot_client, user_id, channel_username, group_username
         
         logger.info(f" Verification result for {user_id}: @{channel_username}={channel_joined}, @{group_username}={group_joined}")
         
-        return channel_joined and group_joined
+        return channel_joined, group_joined
         
     except Exception as e:
-        logger.error(f"Error in verify_all_joins for user {user_id}: {e}")
-        return False
+        logger.error(f"Error in check_all_joins for user {user_id}: {e}")
+        return False, False
+
+async def verify_all_joins(bot_client, user_id, channel_username, group_username):
+    """
+    Verify user has joined both channel and group.
+    Returns True only if user is in BOTH.
+    """
+    channel_joined, group_joined = await check_all_joins(bot_client, user_id, channel_username, group_username)
+    return channel_joined and group_joined
 
 async def validate_session(session_str, user_id=None):
     """Validate Telegram session string."""
@@ -1096,20 +1297,10 @@ async def stop_broadcast_task(uid):
     except Exception as e:
         logger.error(f"Failed to reset cycle counter: {e}")
 
-    if uid in user_tasks:
-        task = user_tasks[uid]
-        try:
-            task.cancel()
-            await task
-            logger.info(f"Cancelled broadcast task for {uid}")
-        except asyncio.CancelledError:
-            logger.info(f"Broadcast task for {uid} was cancelled successfully")
-        except Exception as e:
-            logger.error(f"Failed to cancel broadcast task for {uid}: {e}")
-        finally:
-            user_tasks.pop(uid, None)
+    await cancel_broadcast_task(uid)
     
     db.set_broadcast_state(uid, running=False)
+    ANALYTICS_TEXT_CACHE.pop(uid, None)
     return True
 
 def get_otp_keyboard():
@@ -1186,7 +1377,7 @@ async def group_delay_select_callback(client, callback_query):
 
 <b>New Delay:</b> <code>{delay} seconds</code>
 <i>This will be used for your next broadcast</i>""",
-            reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]]),
+            reply_markup=BACK_TO_MAIN_MARKUP,
             parse_mode=ParseMode.HTML
         )
         await callback_query.answer(f"Group message delay set to {delay}s ", show_alert=True)
@@ -1237,96 +1428,62 @@ async def fetch_forum_topics_parallel(client, ent, disp_id, title):
         logger.error(f"Error fetching topics for {title}: {e}")
         return (disp_id, [])
 
+# One group or channel from an account's dialogs, as scanned for the bulk actions
+GroupRow = namedtuple("GroupRow", ["id", "title", "is_forum"])
+
 def filter_groups_by_keyword(groups_list, keyword):
-    """Filter groups by keyword search"""
+    """Filter GroupRows by keyword search"""
     if not keyword or keyword.strip() == "":
         return groups_list
     
     keyword_lower = keyword.lower().strip()
-    filtered = []
-    
-    for group in groups_list:
-        group_title = group.get('title', '').lower()
-        if keyword_lower in group_title:
-            filtered.append(group)
+    return [group for group in groups_list if keyword_lower in (group.title or '').lower()]
+
+def bulk_select_groups(user_id, groups, forum_only_mode=False):
+    """Add the GroupRows not yet selected, with one existence query and one bulk write"""
+    candidates = {}
+    for group in groups:
+        candidates.setdefault(group.id, {"id": group.id, "title": group.title or 'Unknown'})
+    if not candidates:
+        return 0
     
-    return filtered
+    try:
+        if forum_only_mode:
+            existing_ids = db.get_existing_forum_group_ids(user_id, candidates.keys())
+        else:
+            existing_ids = db.get_existing_target_group_ids(user_id, candidates.keys())
+        to_add = [g for gid, g in candidates.items() if gid not in existing_ids]
+        if forum_only_mode:
+            db.bulk_add_forum_groups(user_id, to_add)
+        else:
+            db.bulk_add_target_groups(user_id, to_add)
+        return len(to_add)
+    except Exception as e:
+        logger.error(f"Error bulk adding groups for {user_id}: {e}")
+        return 0
 
 def bulk_select_all_groups(user_id, groups_list, forum_only_mode=False):
-    """Bulk add all groups (excluding topics)"""
-    added_count = 0
-    
-    for group in groups_list:
-        group_id = group.get('id')
-        group_title = group.get('title', 'Unknown')
-        is_forum = group.get('is_forum', False)
-        group_type = group.get('group_type', '')
-        
-        # Skip topics (only add groups and forums)
-        if group_type == 'topic':
-            continue
-        
-        try:
-            if forum_only_mode:
-                if not db.get_forum_group(user_id, group_id):
-                    db.add_forum_group(user_id, group_id, group_title)
-                    added_count += 1
-            else:
-                if not db.get_target_group(user_id, group_id):
-                    db.add_target_group(user_id, group_id, group_title)
-                    added_count += 1
-        except Exception as e:
-            logger.error(f"Error adding group {group_id}: {e}")
-    
-    return added_count
+    """Bulk add all groups (dialog rows are groups and forums, never topics)"""
+    return bulk_select_groups(user_id, groups_list, forum_only_mode)
 
 def bulk_select_forums_only(user_id, groups_list, forum_only_mode=False):
     """Bulk add only forum groups"""
-    added_count = 0
-    
-    for group in groups_list:
-        group_id = group.get('id')
-        group_title = group.get('title', 'Unknown')
-        is_forum = group.get('is_forum', False)
-        
-        # Only add if it's a forum
-        if not is_forum:
-            continue
-        
-        try:
-            if forum_only_mode:
-                if not db.get_forum_group(user_id, group_id):
-                    db.add_forum_group(user_id, group_id, group_title)
-                    added_count += 1
-            else:
-                if not db.get_target_group(user_id, group_id):
-                    db.add_target_group(user_id, group_id, group_title)
-                    added_count += 1
-        except Exception as e:
-            logger.error(f"Error adding forum {group_id}: {e}")
-    
-    return added_count
+    forums = [g for g in groups_list if g.is_forum]
+    return bulk_select_groups(user_id, forums, forum_only_mode)
 
 def bulk_unselect_all(user_id, groups_list, forum_only_mode=False):
     """Bulk remove all filtered groups"""
-    removed_count = 0
-    
-    for group in groups_list:
-        group_id = group.get('id')
-        
-        try:
-            if forum_only_mode:
-                if db.get_forum_group(user_id, group_id):
-                    db.remove_forum_group(user_id, group_id)
-                    removed_count += 1
-            else:
-                if db.get_target_group(user_id, group_id):
-                    db.remove_target_group(user_id, group_id)
-                    removed_count += 1
-        except Exception as e:
-            logger.error(f"Error removing group {group_id}: {e}")
+    group_ids = {group.id for group in groups_list}
+    if not group_ids:
+        return 0
     
-    return removed_count
+    try:
+        if forum_only_mode:
+            return db.bulk_remove_forum_groups(user_id, group_ids)
+        return db.bulk_remove_target_groups(user_id, group_ids)
+    except Exception as e:
+        logger.error(f"Error bulk removing groups for {user_id}: {e}")
+        return 0
 
 async def analyze_account_groups_fast(tg_client, account_phone, target_group_ids=None, skip_group_ids=None):
     """PRO MAX LEVEL group analysis - skips slow mode and high spam groups for maximum efficiency"""
@@ -1441,15 +1598,15 @@ async def run_broadcast(client, uid):
         delay = db.get_user_ad_delay(uid)
         group_msg_delay = db.get_user_group_msg_delay(uid)
         
-        current_cycle = db.get_current_ad_cycle(uid) if hasattr(db, 'get_current_ad_cycle') else db.get_ad_cycle(uid)
+        current_cycle = db.get_current_ad_cycle(uid)
         
         broadcast_start_time = datetime.utcnow()
-        cycle_timeout = db.get_user_cycle_timeout(uid) if hasattr(db, "get_user_cycle_timeout") else 900
+        cycle_timeout = db.get_user_cycle_timeout(uid)
 
         accounts = db.get_user_accounts(uid) or []
         
         # Get broadcast mode from database (NEW SYSTEM)
-        broadcast_mode = db.get_broadcast_mode(uid) if hasattr(db, 'get_broadcast_mode') else 'both'
+        broadcast_mode = db.get_broadcast_mode(uid)
         
         # Check post link mode first (before broadcast info message)
         post_link_data = db.get_user_post_link(uid)
@@ -1491,9 +1648,7 @@ async def run_broadcast(client, uid):
         session_encrypted = first_account.get("session_string")
         credentials = db.get_user_api_credentials(uid)
         
-        from cryptography.fernet import Fernet
-        cipher_suite = Fernet(config.ENCRYPTION_KEY.encode())
-        session_str = cipher_suite.decrypt(session_encrypted.encode()).decode()
+        session_str = decrypt_session(session_encrypted)
         
         tg_client = TelegramClient(
             StringSession(session_str),
@@ -1527,7 +1682,6 @@ async def run_broadcast(client, uid):
                 
                 if is_forum:
                     try:
-                        from telethon.tl.functions.channels import GetForumTopicsRequest
                         result = await tg_client(GetForumTopicsRequest(
                             channel=group_entity,
                             offset_date=None,
@@ -1641,7 +1795,7 @@ async def run_broadcast(client, uid):
         for acc in accounts:
             try:
                 session_encrypted = acc.get("session_string") or ""
-                session_str = cipher_suite.decrypt(session_encrypted.encode()).decode()
+                session_str = decrypt_session(session_encrypted)
                 if not await validate_session(session_str):
                     db.deactivate_account(acc["_id"])
                     continue
@@ -1687,11 +1841,11 @@ async def run_broadcast(client, uid):
             for cl in clients.values():
                 try:
                     await cl.disconnect()
-                except:
+                except Exception:
                     pass
             return
 
-        user_data = db.get_user(uid)
+        user_data = db.get_user(uid, SCHEDULE_FIELDS)
         should_continue, remaining_seconds, time_message = calculate_remaining_time_today(user_data)
         
         if not should_continue:
@@ -1701,7 +1855,7 @@ async def run_broadcast(client, uid):
             for cl in clients.values():
                 try:
                     await cl.disconnect()
-                except:
+                except Exception:
                     pass
             return
         
@@ -1725,7 +1879,7 @@ async def run_broadcast(client, uid):
                 if schedule_end_time is not None:
                     current_time = get_ist_now()
                     if current_time >= schedule_end_time:
-                        user_data = db.get_user(uid)
+                        user_data = db.get_user(uid, ("schedule_start_time",))
                         start_time_str = user_data.get("schedule_start_time", "12:00 AM")
                         
                         await send_dm_log(uid,
@@ -1741,7 +1895,7 @@ async def run_broadcast(client, uid):
                 # ============================================================
                 #  CHECK SCHEDULED ADS - PAUSE IF OUTSIDE SCHEDULE
                 # ============================================================
-                user_data = db.get_user(uid)
+                user_data = db.get_user(uid, SCHEDULE_FIELDS)
                 within_schedule, schedule_msg = is_within_schedule(user_data)
                 
                 if not within_schedule:
@@ -2043,12 +2197,9 @@ async def run_broadcast(client, uid):
                                 logger.warning(f"Temporary error for group {group['id']}: {err[:80]}, will retry next cycle")
                             continue
 
-                if hasattr(db, 'increment_broadcast_cycle'):
-                    db.increment_broadcast_cycle(uid)
-                else:
-                    db.update_ad_cycle(uid)
+                db.increment_broadcast_cycle(uid)
                 
-                current_cycle = db.get_current_ad_cycle(uid) if hasattr(db, 'get_current_ad_cycle') else db.get_ad_cycle(uid)
+                current_cycle = db.get_current_ad_cycle(uid)
                 logger.debug(f"Updated current_cycle to {current_cycle} for next iteration")
                 
                 user_msg_count = db.get_user_saved_messages_count(uid)
@@ -2076,20 +2227,18 @@ async def run_broadcast(client, uid):
             for cl in clients.values():
                 try:
                     await cl.disconnect()
-                except:
+                except Exception:
                     pass
-            db.set_broadcast_state(uid, running=False)
-            if uid in user_tasks:
-                del user_tasks[uid]
+            if owns_broadcast_state(uid):
+                db.set_broadcast_state(uid, running=False)
 
     except asyncio.CancelledError:
         return
 
     except Exception as e:
         db.increment_broadcast_stats(uid, False)
-        db.set_broadcast_state(uid, running=False)
-        if uid in user_tasks:
-            del user_tasks[uid]
+        if owns_broadcast_state(uid):
+            db.set_broadcast_state(uid, running=False)
         
         await send_dm_log(uid, f"<b> Broadcast task failed:</b> {str(e)}")
         for admin_id in ALLOWED_BD_IDS:
@@ -2212,28 +2361,31 @@ async def go_command(client, message):
             )
             return
         
-        # Check if broadcast is already running
-        state = db.get_broadcast_state(uid)
-        if state.get("running"):
-            await message.reply("<b>⚠️ Broadcast already running!</b>", parse_mode=ParseMode.HTML)
-            return
-        
-        # Start broadcast
-        await message.reply("<b>🚀 Starting broadcast...</b>", parse_mode=ParseMode.HTML)
-        
-        # Create a fake callback query to trigger broadcast
-        from pyrogram.types import CallbackQuery
-        
-        # Set broadcast state to running BEFORE starting task
-        db.set_broadcast_state(uid, running=True, paused=False)
-        
-        # Start broadcast task directly
-        if uid in user_tasks and not user_tasks[uid].done():
-            await message.reply("<b>⚠️ Broadcast task already exists!</b>", parse_mode=ParseMode.HTML)
+        if uid in BROADCAST_STARTING:
+            await message.reply("<b>⏳ Broadcast is already starting!</b>", parse_mode=ParseMode.HTML)
             return
+        BROADCAST_STARTING.add(uid)
+        try:
+            # Check if broadcast is already running
+            state = db.get_broadcast_state(uid)
+            if state.get("running"):
+                await message.reply("<b>⚠️ Broadcast already running!</b>", parse_mode=ParseMode.HTML)
+                return
             
-        task = asyncio.create_task(run_broadcast(client, uid))
-        user_tasks[uid] = task
+            # Start broadcast
+            await message.reply("<b>🚀 Starting broadcast...</b>", parse_mode=ParseMode.HTML)
+            
+            # Set broadcast state to running BEFORE starting task
+            db.set_broadcast_state(uid, running=True, paused=False)
+            
+            # Start broadcast task directly
+            if uid in user_tasks and not user_tasks[uid].done():
+                await message.reply("<b>⚠️ Broadcast task already exists!</b>", parse_mode=ParseMode.HTML)
+                return
+                
+            track_broadcast_task(uid, asyncio.create_task(run_broadcast(client, uid)))
+        finally:
+            BROADCAST_STARTING.discard(uid)
         
         await message.reply("<b>✅ Broadcast started!</b>\n\n<i>check the logger bot @aztechloggersbot</i>", parse_mode=ParseMode.HTML)
         await send_dm_log(uid, "<b>🚀 Broadcast started via /go command!</b>")
@@ -2558,7 +2710,7 @@ async def leaderboard_command(client, message):
                 parse_mode=ParseMode.HTML
             )
 
-@pyro.on_callback_query(filters.regex("^leaderboard_refresh$"))
+@pyro.on_callback_query(callback_data_filter("leaderboard_refresh"))
 async def leaderboard_callback(client, callback_query):
     """Handle leaderboard refresh callback"""
     try:
@@ -2676,7 +2828,7 @@ async def otp_callback(client, callback_query):
                     f" <b>API credentials not found!</b>\n\n"
                     f"Please restart the account addition process.",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 return
             
@@ -2783,173 +2935,228 @@ async def otp_callback(client, callback_query):
 #   GROUPS MENU SYSTEM
 # =======================================================
 
-@pyro.on_callback_query(filters.regex("^groups_menu"))
-async def groups_menu_callback(client, callback_query):
-    """Handle groups menu callback with forum filter support"""
-    try:
-        uid = callback_query.from_user.id
+async def fetch_groups_menu_groups(uid, accounts, on_progress=None):
+    """
+    Fetch all groups (flagged with is_forum) shown in the groups menu from all accounts.
+    on_progress(groups_so_far, accounts_done) is awaited as each account finishes.
+    """
+    async def get_account_groups(acc):
         try:
-            page = int(callback_query.data.split("_")[-1]) if callback_query.data.count("_") > 1 else 1
-        except ValueError:
-            page = 1
-        accounts = db.get_user_accounts(uid)
-        
-        if not accounts:
-            await callback_query.answer("No accounts added yet!", show_alert=True)
-            return
+            session_str = decrypt_session(acc['session_string'])
+            credentials = db.get_user_api_credentials(uid)
+            if not credentials:
+                logger.error(f"No API credentials found for user {uid}")
+                return []
+            
+            async with TelegramClient(StringSession(session_str), credentials['api_id'], credentials['api_hash']) as tg_client:
+                groups = []
+                async for dialog in tg_client.iter_dialogs(limit=None):
+                    if dialog.is_group:
+                        # iter_dialogs already returns the full Channel/Chat entity
+                        groups.append({
+                            'id': dialog.id,
+                            'title': dialog.title,
+                            'is_forum': bool(getattr(dialog.entity, 'forum', False))
+                        })
+                return groups
+        except Exception as e:
+            logger.error(f"Failed to get groups for account {acc['phone_number']}: {e}")
+            return []
+
+    tasks = [get_account_groups(acc) for acc in accounts]
+    
+    all_groups = []
+    seen_ids = set()
+    for accounts_done, next_done in enumerate(asyncio.as_completed(tasks), start=1):
+        groups = await next_done
+        for group in groups:
+            if group['id'] not in seen_ids:
+                seen_ids.add(group['id'])
+                all_groups.append(group)
+        if on_progress:
+            await on_progress(all_groups, accounts_done)
+    return all_groups
+
+GROUPS_MENU_PAGE_SIZE = 8
+
+async def render_groups_menu(message, current_groups, total_groups, selected_count, selected_group_ids, forum_only_mode, page=1):
+    """Render one page of the groups menu"""
+    total_pages = (total_groups + GROUPS_MENU_PAGE_SIZE - 1) // GROUPS_MENU_PAGE_SIZE
+    forum_count = total_groups if forum_only_mode else 0
+
+    mode_text = " Forum Groups Only" if forum_only_mode else " All Groups"
+    caption = f"<b>BROADCAST GROUPS </b>\n\n"
+    caption += f"<b>Mode:</b> {mode_text}\n"
+    caption += f"<b>Selected:</b> {selected_count}/{total_groups}\n"
+    if forum_count > 0:
+        caption += f"<b>Forum Groups:</b> {forum_count}\n"
+    caption += "\n<i>Click on groups to toggle selection:</i>\n"
+
+    buttons = []
+    group_pairs = [current_groups[i:i+2] for i in range(0, len(current_groups), 2)]
+    
+    for row_idx, pair in enumerate(group_pairs):
+        row = []
+        for col_idx, group in enumerate(pair):
+            status = "" if group['id'] in selected_group_ids else ""
+            forum_icon = " " if group.get('is_forum', False) else ""
+            row.append(InlineKeyboardButton(
+                f"{group['title'][:18]}{forum_icon} {status}",
+                callback_data=f"toggle_group_{group['id']}_{row_idx}_{col_idx}"
+            ))
+        buttons.append(row)
+
+    nav_buttons = []
+    if page > 1:
+        nav_buttons.append(InlineKeyboardButton("", callback_data=f"groups_menu_{page-1}"))
+    nav_buttons.append(InlineKeyboardButton(f"{page}/{total_pages}", callback_data="noop"))
+    if page < total_pages:
+        nav_buttons.append(InlineKeyboardButton("", callback_data=f"groups_menu_{page+1}"))
+    if nav_buttons:
+        buttons.append(nav_buttons)
+
+    toggle_text = " Show All Groups" if forum_only_mode else " Forum Groups Only"
+    buttons.append([
+        InlineKeyboardButton(toggle_text, callback_data="toggle_forum_mode")
+    ])
+    buttons.append([
+        InlineKeyboardButton("+ Select All", callback_data="select_all_groups"),
+        InlineKeyboardButton("- Unselect All", callback_data="unselect_all_groups")
+    ])
+    buttons.append([
+        InlineKeyboardButton("? Search Groups", callback_data="search_groups"),
+        InlineKeyboardButton("× Clear Filter", callback_data="clear_search_filter")
+    ])
+    buttons.append([
+        InlineKeyboardButton("++ Add All Groups", callback_data="add_all_groups_bulk"),
+        InlineKeyboardButton("◆ Add Topics Only", callback_data="add_forums_only")
+    ])
+    buttons.append([
+        InlineKeyboardButton("-- Remove Filtered", callback_data="unselect_all_filtered")
+    ])
+    buttons.append([InlineKeyboardButton("✓ Done", callback_data="menu_main")])
+
+    caption += f"\nPage {page}/{total_pages}"
+    try:
+        await message.edit_caption(
+            caption=caption,
+            reply_markup=kb(buttons),
+            parse_mode=ParseMode.HTML
+        )
+    except MessageNotModified:
+        # Final render can match the last partial render exactly
+        pass
+
+def get_selected_group_ids(uid, forum_only_mode):
+    """Get the ids of the user's selected groups for the current mode"""
+    if forum_only_mode:
+        selected_groups = db.get_forum_groups(uid) or []
+    else:
+        selected_groups = db.get_target_groups(uid) or []
+    return {g['group_id'] for g in selected_groups}
+
+# uid -> (all groups menu entries, expires_at); page flips right after a scan skip Mongo too
+GROUPS_MENU_MEMORY_CACHE = {}
+GROUPS_MENU_MEMORY_TTL = 60
+
+def paginate_groups_menu(groups, forum_only_mode, selected_group_ids, page):
+    """Pick the page window, total and selected count for one mode in a single pass"""
+    start_idx = (page - 1) * GROUPS_MENU_PAGE_SIZE
+    end_idx = start_idx + GROUPS_MENU_PAGE_SIZE
+    current_groups = []
+    total_groups = 0
+    selected_count = 0
+    for group in groups:
+        if group['is_forum'] != forum_only_mode:
+            continue
+        if start_idx <= total_groups < end_idx:
+            current_groups.append(group)
+        total_groups += 1
+        if group['id'] in selected_group_ids:
+            selected_count += 1
+    return current_groups, total_groups, selected_count
+
+async def show_groups_menu(callback_query, page=1, refresh=False):
+    """Render a groups menu page from the cached listing, scanning dialogs only when needed"""
+    uid = callback_query.from_user.id
+    accounts = db.get_user_accounts(uid)
+    
+    if not accounts:
+        await callback_query.answer("No accounts added yet!", show_alert=True)
+        return
 
-        user = db.db.users.find_one({"user_id": uid})
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
+    forum_only_mode = get_forum_only_mode(uid)
+    selected_group_ids = get_selected_group_ids(uid, forum_only_mode)
 
+    cached = GROUPS_MENU_MEMORY_CACHE.get(uid)
+    if cached and cached[1] <= time.monotonic():
+        GROUPS_MENU_MEMORY_CACHE.pop(uid, None)
+        cached = None
+    if not refresh and cached:
+        current_groups, total_groups, selected_count = paginate_groups_menu(
+            cached[0], forum_only_mode, selected_group_ids, page
+        )
+    elif refresh or not db.has_groups_menu_cache(uid):
         await callback_query.message.edit_caption(
             caption="<b>⏳ Loading groups...</b>",
             parse_mode=ParseMode.HTML
         )
 
-        all_groups = []
-        if forum_only_mode:
-            selected_groups = db.get_forum_groups(uid) or []
-        else:
-            selected_groups = db.get_target_groups(uid) or []
-        selected_group_ids = [g['group_id'] for g in selected_groups]
-        
-        async def get_account_groups(acc):
+        async def render_partial(groups_so_far, accounts_done):
+            # Show what the faster accounts returned instead of waiting on the slowest
+            if accounts_done == len(accounts):
+                return
             try:
-                session_str = cipher_suite.decrypt(acc['session_string'].encode()).decode()
-                credentials = db.get_user_api_credentials(uid)
-                if not credentials:
-                    logger.error(f"No API credentials found for user {uid}")
-                    return []
-                
-                async with TelegramClient(StringSession(session_str), credentials['api_id'], credentials['api_hash']) as tg_client:
-                    groups = []
-                    async for dialog in tg_client.iter_dialogs(limit=None):
-                        if dialog.is_group:
-                            is_forum = False
-                            try:
-                                entity = await tg_client.get_entity(dialog.id)
-                                is_forum = getattr(entity, 'forum', False)
-                            except:
-                                is_forum = False
-                            
-                            if forum_only_mode:
-                                if not is_forum:
-                                    continue
-                            else:
-                                if is_forum:
-                                    continue
-                            
-                            group_data = {
-                                'id': dialog.id,
-                                'title': dialog.title,
-                                'selected': dialog.id in selected_group_ids,
-                                'is_forum': is_forum
-                            }
-                            groups.append(group_data)
-                    return groups
+                await render_groups_menu(
+                    callback_query.message,
+                    *paginate_groups_menu(groups_so_far, forum_only_mode, selected_group_ids, page),
+                    selected_group_ids, forum_only_mode, page
+                )
             except Exception as e:
-                logger.error(f"Failed to get groups for account {acc['phone_number']}: {e}")
-                return []
-
-        tasks = [get_account_groups(acc) for acc in accounts]
-        groups_lists = await asyncio.gather(*tasks)
-        
-        seen_ids = set()
-        for groups in groups_lists:
-            for group in groups:
-                if group['id'] not in seen_ids:
-                    seen_ids.add(group['id'])
-                    all_groups.append(group)
-
-        items_per_page = 8
-        total_pages = (len(all_groups) + items_per_page - 1) // items_per_page
-        start_idx = (page - 1) * items_per_page
-        end_idx = start_idx + items_per_page
-        current_groups = all_groups[start_idx:end_idx]
-
-        total_groups = len(all_groups)
-        selected_count = sum(1 for g in all_groups if g['selected'])
-        forum_count = sum(1 for g in all_groups if g.get('is_forum', False))
-
-        mode_text = " Forum Groups Only" if forum_only_mode else " All Groups"
-        caption = f"<b>BROADCAST GROUPS </b>\n\n"
-        caption += f"<b>Mode:</b> {mode_text}\n"
-        caption += f"<b>Selected:</b> {selected_count}/{total_groups}\n"
-        if forum_count > 0:
-            caption += f"<b>Forum Groups:</b> {forum_count}\n"
-        caption += "\n<i>Click on groups to toggle selection:</i>\n"
-
-        buttons = []
-        group_pairs = [current_groups[i:i+2] for i in range(0, len(current_groups), 2)]
-        selected_ids = [g['group_id'] for g in selected_groups]
-        
-        for pair in group_pairs:
-            row = []
-            for group in pair:
-                status = "" if group['id'] in selected_ids else ""
-                forum_icon = " " if group.get('is_forum', False) else ""
-                row.append(InlineKeyboardButton(
-                    f"{group['title'][:18]}{forum_icon} {status}",
-                    callback_data=f"toggle_group_{group['id']}"
-                ))
-            buttons.append(row)
+                logger.debug(f"Partial groups menu render failed for user {uid}: {e}")
 
-        nav_buttons = []
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton("", callback_data=f"groups_menu_{page-1}"))
-        nav_buttons.append(InlineKeyboardButton(f"{page}/{total_pages}", callback_data="noop"))
-        if page < total_pages:
-            nav_buttons.append(InlineKeyboardButton("", callback_data=f"groups_menu_{page+1}"))
-        if nav_buttons:
-            buttons.append(nav_buttons)
+        all_groups = await fetch_groups_menu_groups(uid, accounts, on_progress=render_partial)
+        db.save_groups_menu_cache(uid, all_groups)
+        GROUPS_MENU_MEMORY_CACHE[uid] = (all_groups, time.monotonic() + GROUPS_MENU_MEMORY_TTL)
+        current_groups, total_groups, selected_count = paginate_groups_menu(
+            all_groups, forum_only_mode, selected_group_ids, page
+        )
+    else:
+        # Only the visible window is read back; counts are answered by the index
+        total_groups = db.count_groups_menu(uid, forum_only_mode)
+        selected_count = db.count_groups_menu(uid, forum_only_mode, selected_group_ids)
+        current_groups = db.get_groups_menu_page(
+            uid, forum_only_mode, (page - 1) * GROUPS_MENU_PAGE_SIZE, GROUPS_MENU_PAGE_SIZE
+        )
 
-        toggle_text = " Show All Groups" if forum_only_mode else " Forum Groups Only"
-        buttons.append([
-            InlineKeyboardButton(toggle_text, callback_data="toggle_forum_mode")
-        ])
-        buttons.append([
-            InlineKeyboardButton("+ Select All", callback_data="select_all_groups"),
-            InlineKeyboardButton("- Unselect All", callback_data="unselect_all_groups")
-        ])
-        buttons.append([
-            InlineKeyboardButton("? Search Groups", callback_data="search_groups"),
-            InlineKeyboardButton("× Clear Filter", callback_data="clear_search_filter")
-        ])
-        buttons.append([
-            InlineKeyboardButton("++ Add All Groups", callback_data="add_all_groups_bulk"),
-            InlineKeyboardButton("◆ Add Topics Only", callback_data="add_forums_only")
-        ])
-        buttons.append([
-            InlineKeyboardButton("-- Remove Filtered", callback_data="unselect_all_filtered")
-        ])
-        buttons.append([InlineKeyboardButton("✓ Done", callback_data="menu_main")])
+    await render_groups_menu(
+        callback_query.message, current_groups, total_groups, selected_count,
+        selected_group_ids, forum_only_mode, page
+    )
 
-        caption += f"\nPage {page}/{total_pages}"
-        await callback_query.message.edit_caption(
-            caption=caption,
-            reply_markup=kb(buttons),
-            parse_mode=ParseMode.HTML
-        )
+@pyro.on_callback_query(filters.regex("^groups_menu"))
+async def groups_menu_callback(client, callback_query):
+    """Handle groups menu callback with forum filter support"""
+    try:
+        try:
+            page_part = callback_query.data[len("groups_menu_"):]
+            page = int(page_part) if page_part else 1
+        except ValueError:
+            page = 1
+        # Opening the menu rescans dialogs; page flips are served from the cached listing
+        await show_groups_menu(callback_query, page, refresh=callback_query.data == "groups_menu")
         
     except Exception as e:
         logger.error(f"Error in groups menu callback: {e}")
         await callback_query.answer("Error loading groups menu. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^toggle_forum_mode$"))
+@pyro.on_callback_query(callback_data_filter("toggle_forum_mode"))
 async def toggle_forum_mode_callback(client, callback_query):
     """Handle forum mode toggle callback"""
     try:
         uid = callback_query.from_user.id
         
-        user = db.db.users.find_one({"user_id": uid})
-        current_mode = user.get("forum_only_mode", False) if user else False
-        
-        new_mode = not current_mode
-        db.db.users.update_one(
-            {"user_id": uid},
-            {"$set": {"forum_only_mode": new_mode}},
-            upsert=True
-        )
+        new_mode = toggle_forum_only_mode(uid)
         
         if new_mode:
             existing_groups = db.get_target_groups(uid) or []
@@ -2962,29 +3169,34 @@ async def toggle_forum_mode_callback(client, callback_query):
                 if accounts:
                     acc = accounts[0]
                     try:
-                        session_str = cipher_suite.decrypt(acc['session_string'].encode()).decode()
+                        session_str = decrypt_session(acc['session_string'])
                         credentials = db.get_user_api_credentials(uid)
                         if credentials:
                             async with TelegramClient(StringSession(session_str), credentials['api_id'], credentials['api_hash']) as tg_client:
-                                for group in groups_without_flag:
-                                    try:
-                                        entity = await tg_client.get_entity(group['group_id'])
-                                        is_forum = getattr(entity, 'forum', False)
-                                        
-                                        db.db.target_groups.update_one(
-                                            {"user_id": uid, "group_id": group['group_id']},
-                                            {"$set": {"is_forum": is_forum}}
-                                        )
-                                    except:
-                                        pass
+                                group_ids = [g['group_id'] for g in groups_without_flag]
+                                try:
+                                    entities = await tg_client.get_entity(group_ids)
+                                    forum_flags = {
+                                        gid: getattr(entity, 'forum', False)
+                                        for gid, entity in zip(group_ids, entities)
+                                    }
+                                except Exception:
+                                    # One unresolvable id fails the whole batch; resolve individually
+                                    forum_flags = {}
+                                    for gid in group_ids:
+                                        try:
+                                            entity = await tg_client.get_entity(gid)
+                                            forum_flags[gid] = getattr(entity, 'forum', False)
+                                        except Exception as e:
+                                            logger.debug(f"Could not resolve group {gid} for user {uid}: {e}")
+                                db.set_target_groups_forum_flags(uid, forum_flags)
                     except Exception as e:
                         logger.error(f"Error updating groups: {e}")
         
         mode_text = "Forum Groups Only " if new_mode else "All Groups "
         await callback_query.answer(f"Switched to: {mode_text}", show_alert=False)
         
-        callback_query.data = "groups_menu"
-        await groups_menu_callback(client, callback_query)
+        await show_groups_menu(callback_query)
         
     except Exception as e:
         logger.error(f"Error in toggle_forum_mode callback: {e}")
@@ -2995,28 +3207,40 @@ async def toggle_group_callback(client, callback_query):
     """Handle toggle group selection callback"""
     try:
         uid = callback_query.from_user.id
-        group_id = int(callback_query.data.split("_")[2])
+        # toggle_group_<id>[_<row>_<col>]
+        group_part, _, position_part = callback_query.data[len("toggle_group_"):].partition("_")
+        group_id = int(group_part)
         
-        user = db.db.users.find_one({"user_id": uid})
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
+        forum_only_mode = get_forum_only_mode(uid)
         
         if forum_only_mode:
             group_state = db.get_forum_group(uid, group_id)
         else:
             group_state = db.get_target_group(uid, group_id)
         
+        # Buttons carry their (row, col) so the pressed cell is found without scanning
+        keyboard = callback_query.message.reply_markup.inline_keyboard
+        position = None
+        row_part, _, col_part = position_part.partition("_")
+        if col_part:
+            row_idx, col_idx = int(row_part), int(col_part)
+            if row_idx < len(keyboard) and col_idx < len(keyboard[row_idx]) \
+                    and keyboard[row_idx][col_idx].callback_data == callback_query.data:
+                position = (row_idx, col_idx)
+        if position is None:
+            position = next(
+                ((i, j) for i, row in enumerate(keyboard) for j, button in enumerate(row)
+                 if button.callback_data == callback_query.data),
+                None
+            )
+        
         title = None
         is_forum = False
         
-        for row in callback_query.message.reply_markup.inline_keyboard:
-            for button in row:
-                if button.callback_data == f"toggle_group_{group_id}":
-                    button_text = button.text
-                    is_forum = "" in button_text
-                    title = button_text.replace(" ", "").replace(" ", "").replace(" ", "").strip()
-                    break
-            if title:
-                break
+        if position:
+            button_text = keyboard[position[0]][position[1]].text
+            is_forum = "" in button_text
+            title = button_text.replace(" ", "").replace(" ", "").replace(" ", "").strip()
 
         if group_state:
             if forum_only_mode:
@@ -3036,7 +3260,7 @@ async def toggle_group_callback(client, callback_query):
                     accounts = db.get_user_accounts(uid)
                     if accounts:
                         acc = accounts[0]
-                        session_str = cipher_suite.decrypt(acc['session_string'].encode()).decode()
+                        session_str = decrypt_session(acc['session_string'])
                         credentials = db.get_user_api_credentials(uid)
                         if credentials:
                             async with TelegramClient(StringSession(session_str), credentials['api_id'], credentials['api_hash']) as temp_client:
@@ -3051,102 +3275,92 @@ async def toggle_group_callback(client, callback_query):
                     await callback_query.answer("Error adding group", show_alert=True)
                     return
 
-        new_markup = list(callback_query.message.reply_markup.inline_keyboard)
-        for i, row in enumerate(new_markup):
-            for j, button in enumerate(row):
-                if button.callback_data == f"toggle_group_{group_id}":
-                    status = "" if group_state else ""
-                    new_markup[i][j] = InlineKeyboardButton(
-                        f"{title} {status}",
-                        callback_data=f"toggle_group_{group_id}"
-                    )
-
-        await callback_query.message.edit_reply_markup(
-            reply_markup=InlineKeyboardMarkup(new_markup)
-        )
+        if position:
+            status = "" if group_state else ""
+            new_text = f"{title} {status}"
+            # Only the pressed cell can change; skip the round trip when its label is identical
+            if keyboard[position[0]][position[1]].text != new_text:
+                keyboard[position[0]][position[1]] = InlineKeyboardButton(
+                    new_text,
+                    callback_data=callback_query.data
+                )
+                await callback_query.message.edit_reply_markup(
+                    reply_markup=InlineKeyboardMarkup(keyboard)
+                )
 
     except Exception as e:
         logger.error(f"Error in toggle group callback: {e}")
         await callback_query.answer("Error toggling group. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^select_all_groups$"))
+@pyro.on_callback_query(callback_data_filter("select_all_groups"))
 async def select_all_groups_callback(client, callback_query):
     """Handle select all groups callback"""
     try:
         uid = callback_query.from_user.id
         
-        user = db.db.users.find_one({"user_id": uid})
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
-        
-        if forum_only_mode:
-            selected_groups = db.get_forum_groups(uid) or []
-        else:
-            selected_groups = db.get_target_groups(uid) or []
-        
-        all_groups = []
-        
+        forum_only_mode = get_forum_only_mode(uid)
+
         accounts = db.get_user_accounts(uid)
-        for acc in accounts:
+        seen_ids = set()
+
+        async def fetch_account_groups(acc):
             try:
-                session_str = cipher_suite.decrypt(acc['session_string'].encode()).decode()
+                session_str = decrypt_session(acc['session_string'])
                 credentials = db.get_user_api_credentials(acc['user_id'])
                 if not credentials:
                     logger.error(f"No API credentials found for user {acc['user_id']}")
-                    continue
-                
+                    return []
+
+                groups = []
                 async with TelegramClient(StringSession(session_str), credentials['api_id'], credentials['api_hash']) as tg_client:
                     async for dialog in tg_client.iter_dialogs():
-                        if dialog.is_group and dialog.id not in [g['id'] for g in all_groups]:
+                        if dialog.is_group and dialog.id not in seen_ids:
+                            seen_ids.add(dialog.id)
                             try:
                                 entity = await tg_client.get_entity(dialog.id)
                                 is_forum = getattr(entity, 'forum', False)
-                                
+
                                 if forum_only_mode:
                                     if not is_forum:
                                         continue
                                 else:
                                     if is_forum:
                                         continue
-                                
-                                all_groups.append({
+
+                                groups.append({
                                     'id': dialog.id,
                                     'title': dialog.title,
                                     'is_forum': is_forum
                                 })
                             except:
-                                pass
+                                seen_ids.discard(dialog.id)
+                return groups
             except Exception as e:
                 logger.error(f"Error adding groups for account {acc['phone_number']}: {e}")
-                continue
-        
-        for group in selected_groups:
-            if forum_only_mode:
-                db.remove_forum_group(uid, group['group_id'])
-            else:
-                db.remove_target_group(uid, group['group_id'])
-        
-        for group in all_groups:
-            try:
-                group_name = group.get('title', 'Unknown')
-                if forum_only_mode:
-                    db.add_forum_group(uid, group['id'], group_name)
-                else:
-                    db.add_target_group(uid, group['id'], group_name)
-            except Exception as e:
-                logger.error(f"Error adding group {group.get('title', 'Unknown')}: {e}")
-                continue
-        
-        mode_text = "forum groups" if forum_only_mode else "groups"
+                return []
+
+        groups_lists = await asyncio.gather(*[fetch_account_groups(acc) for acc in accounts], return_exceptions=True)
+
+        all_groups = []
+        for groups in groups_lists:
+            if isinstance(groups, list):
+                all_groups.extend(groups)
+
+        if forum_only_mode:
+            db.replace_forum_groups(uid, all_groups)
+        else:
+            db.replace_target_groups(uid, all_groups)
+
+        mode_text = "forum groups" if forum_only_mode else "groups"
         await callback_query.answer(f" All {mode_text} selected!", show_alert=True)
 
-        callback_query.data = "groups_menu"
-        await groups_menu_callback(client, callback_query)
+        await show_groups_menu(callback_query)
 
     except Exception as e:
         logger.error(f"Error in select all groups callback: {e}")
         await callback_query.answer("Error selecting groups. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^menu_manage_account$"))
+@pyro.on_callback_query(callback_data_filter("menu_manage_account"))
 async def menu_manage_account_callback(client, callback_query):
     """Handle manage account menu"""
     try:
@@ -3194,7 +3408,7 @@ async def menu_manage_account_callback(client, callback_query):
         logger.error(f"Error in menu_manage_account callback: {e}")
         await callback_query.answer("Error loading account menu. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^menu_post_link$"))
+@pyro.on_callback_query(callback_data_filter("menu_post_link"))
 async def menu_post_link_callback(client, callback_query):
     """Handle post link management menu"""
     try:
@@ -3239,7 +3453,7 @@ async def menu_post_link_callback(client, callback_query):
         logger.error(f"Error in menu_post_link callback: {e}")
         await callback_query.answer("Error loading post link menu. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^set_post_link$"))
+@pyro.on_callback_query(callback_data_filter("set_post_link"))
 async def set_post_link_callback(client, callback_query):
     """Handle set post link callback"""
     try:
@@ -3263,7 +3477,7 @@ async def set_post_link_callback(client, callback_query):
         logger.error(f"Error in set_post_link callback: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^use_saved_messages$"))
+@pyro.on_callback_query(callback_data_filter("use_saved_messages"))
 async def use_saved_messages_callback(client, callback_query):
     """Handle use saved messages callback"""
     try:
@@ -3288,7 +3502,7 @@ async def use_saved_messages_callback(client, callback_query):
         logger.error(f"Error in use_saved_messages callback: {e}")
         await callback_query.answer("Error switching mode. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^toggle_message_mode$"))
+@pyro.on_callback_query(callback_data_filter("toggle_message_mode"))
 async def toggle_message_mode_callback(client, callback_query):
     """Handle toggle message mode callback"""
     try:
@@ -3323,7 +3537,7 @@ async def toggle_message_mode_callback(client, callback_query):
         logger.error(f"Error in toggle_message_mode callback: {e}")
         await callback_query.answer("Error toggling mode. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^clear_post_link$"))
+@pyro.on_callback_query(callback_data_filter("clear_post_link"))
 async def clear_post_link_callback(client, callback_query):
     """Handle clear post link callback"""
     try:
@@ -3356,7 +3570,8 @@ async def clear_post_link_callback(client, callback_query):
         logger.error(f"Error in clear_post_link callback: {e}")
         await callback_query.answer("Error clearing post link. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^groups_only_mode$"))
+@pyro.on_callback_query(callback_data_filter("groups_only_mode", "both_mode_groups"))
+@memoize_groups_cache_per_callback
 async def groups_only_mode_callback(client, callback_query):
     """Handle groups only mode - show only regular groups (NO topics/forums)"""
     try:
@@ -3382,7 +3597,8 @@ async def groups_only_mode_callback(client, callback_query):
         
         # Get selected groups
         target_groups = db.get_target_groups(uid)
-        selected_group_ids = [g.get("group_id", g.get("id")) for g in target_groups if g]
+        selected_group_ids = {g.get("group_id", g.get("id")) for g in target_groups if g}
+        selected_count = len(selected_group_ids.intersection(g['id'] for g in regular_groups))
         
         # Pagination setup
         page = 0  # Default to first page
@@ -3394,7 +3610,7 @@ async def groups_only_mode_callback(client, callback_query):
         menu_text = (
             f"<b> GROUPS ONLY MODE</b>\n\n"
             f"Total Regular Groups: <b>{len(regular_groups)}</b>\n"
-            f"Selected: <b>{len([g for g in regular_groups if g['id'] in selected_group_ids])}</b>\n"
+            f"Selected: <b>{selected_count}</b>\n"
             f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
             f"<i>Select groups to add to broadcast list (no topics).</i>"
         )
@@ -3407,13 +3623,13 @@ async def groups_only_mode_callback(client, callback_query):
         ]
         
         # Add individual group buttons for current page
-        for group in regular_groups[start_idx:end_idx]:
-            is_selected = group["id"] in selected_group_ids
-            emoji = "" if is_selected else ""
-            buttons.append([InlineKeyboardButton(
-                f"{emoji} {group['title'][:30]}",
-                callback_data=f"toggle_group_{group['id']}"
-            )])
+        buttons.extend([
+            [InlineKeyboardButton(
+                f"{'' if group['id'] in selected_group_ids else ''} {group['title'][:30]}",
+                callback_data=f"toggle_group_{group['id']}_{row_idx}_0"
+            )]
+            for row_idx, group in enumerate(regular_groups[start_idx:end_idx], start=len(buttons))
+        ])
         
         # Add pagination buttons
         nav_buttons = []
@@ -3437,7 +3653,7 @@ async def groups_only_mode_callback(client, callback_query):
         logger.error(f"Error in groups_only_mode callback: {e}")
         await callback_query.answer("Error loading groups. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^refresh_groups_cache$"))
+@pyro.on_callback_query(callback_data_filter("refresh_groups_cache"))
 async def refresh_groups_cache_callback(client, callback_query):
     """Manually refresh groups cache"""
     try:
@@ -3452,14 +3668,16 @@ async def refresh_groups_cache_callback(client, callback_query):
         )
         
         # Fetch fresh data and update cache
+        invalidate_user_dialog_caches(uid)
         await fetch_and_cache_groups_to_mongo(uid)
+        await refresh_menu_group_counts(uid)
         
         # Get updated count
-        cached_groups = db.get_cached_groups(uid)
+        cached_count = db.count_cached_groups(uid)
         
         await msg.edit_text(
             f"<b>✅ Groups Cache Refreshed!</b>\n\n"
-            f"<b>Total Groups Cached:</b> {len(cached_groups)}\n\n"
+            f"<b>Total Groups Cached:</b> {cached_count}\n\n"
             f"<i>All groups data has been updated from Telegram.</i>",
             parse_mode=ParseMode.HTML
         )
@@ -3473,30 +3691,31 @@ async def groups_page_callback(client, callback_query):
     """Handle groups pagination"""
     try:
         uid = callback_query.from_user.id
-        page = int(callback_query.data.split("_")[-1])
+        page = int(callback_query.matches[0].group(1))
         
-        # Use cached groups - NO fetching!
-        cached_data = db.get_cached_groups(uid)
-        all_groups = cached_data.get("groups", []) if cached_data else []
+        # Use cached groups - NO fetching! Only the visible page is read from Mongo
+        items_per_page = 10
+        total_groups = db.count_cached_groups(uid)
         
-        if not all_groups:
+        if not total_groups:
             await callback_query.answer(" No cached groups. Please go back and reload.", show_alert=True)
             return
         
         # Pagination setup
-        items_per_page = 10
         start_idx = page * items_per_page
         end_idx = start_idx + items_per_page
-        total_pages = (len(all_groups) + items_per_page - 1) // items_per_page
+        total_pages = (total_groups + items_per_page - 1) // items_per_page
+        page_groups = db.get_cached_groups_page(uid, start_idx, items_per_page)
         
         # Get selected groups
         target_groups = db.get_target_groups(uid)
-        selected_group_ids = [g.get("group_id", g.get("id")) for g in target_groups if g]
+        selected_group_ids = {g.get("group_id", g.get("id")) for g in target_groups if g}
+        selected_count = db.count_cached_groups(uid, selected_group_ids)
         
         menu_text = (
             f"<b> GROUPS ONLY MODE</b>\n\n"
-            f"Total Groups: <b>{len(all_groups)}</b>\n"
-            f"Selected: <b>{len([g for g in all_groups if g['id'] in selected_group_ids])}</b>\n"
+            f"Total Groups: <b>{total_groups}</b>\n"
+            f"Selected: <b>{selected_count}</b>\n"
             f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
             f"<i>Select groups to add to broadcast list.</i>"
         )
@@ -3509,19 +3728,19 @@ async def groups_page_callback(client, callback_query):
         ]
         
         # Add individual group buttons for current page
-        for group in all_groups[start_idx:end_idx]:
-            is_selected = group["id"] in selected_group_ids
-            emoji = "" if is_selected else ""
-            buttons.append([InlineKeyboardButton(
-                f"{emoji} {group['title'][:30]}",
-                callback_data=f"toggle_group_{group['id']}"
-            )])
+        buttons.extend([
+            [InlineKeyboardButton(
+                f"{'' if group['id'] in selected_group_ids else ''} {group['title'][:30]}",
+                callback_data=f"toggle_group_{group['id']}_{row_idx}_0"
+            )]
+            for row_idx, group in enumerate(page_groups, start=len(buttons))
+        ])
         
         # Add pagination buttons
         nav_buttons = []
         if page > 0:
             nav_buttons.append(InlineKeyboardButton("< Back", callback_data=f"groups_page_{page - 1}"))
-        if end_idx < len(all_groups):
+        if end_idx < total_groups:
             nav_buttons.append(InlineKeyboardButton(">", callback_data=f"groups_page_{page + 1}"))
         
         if nav_buttons:
@@ -3539,35 +3758,21 @@ async def groups_page_callback(client, callback_query):
         logger.error(f"Error in groups_page callback: {e}")
         await callback_query.answer("Error loading page. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^groups_only_select_all$"))
+@pyro.on_callback_query(callback_data_filter("groups_only_select_all"))
+@memoize_groups_cache_per_callback
 async def groups_only_select_all_callback(client, callback_query):
     """Select all regular groups"""
     try:
         uid = callback_query.from_user.id
         await callback_query.answer("Adding all groups...")
         
-        # Fetch groups
-        accounts = db.get_user_accounts(uid)
-        all_groups = []
-        for acc in accounts:
-            try:
-                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                async for dialog in tg_client.iter_dialogs():
-                    if dialog.is_group or dialog.is_channel:
-                        entity = dialog.entity
-                        is_forum = getattr(entity, 'forum', False)
-                        if not is_forum:
-                            all_groups.append({"id": entity.id, "title": dialog.title})
-                break
-            except Exception as e:
-                logger.error(f"Error fetching groups: {e}")
-                continue
+        # Same listing groups_only_mode shows; only fetches from Telegram when the cache is empty
+        cached_groups = await get_groups_from_mongo_cache(uid)
+        all_groups = [g for g in cached_groups if not g.get('is_forum', False)]
         
-        added_count = 0
-        for group in all_groups:
-            if not db.get_target_group(uid, group["id"]):
-                db.add_target_group(uid, group["id"], group["title"])
-                added_count += 1
+        existing = {g["group_id"] for g in db.get_target_groups(uid)}
+        to_add = [group for group in all_groups if group["id"] not in existing]
+        added_count = db.bulk_add_target_groups(uid, to_add)
         
         await callback_query.answer(f" Added {added_count} groups")
         await groups_only_mode_callback(client, callback_query)
@@ -3576,35 +3781,21 @@ async def groups_only_select_all_callback(client, callback_query):
         logger.error(f"Error in groups_only_select_all: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^groups_only_unselect_all$"))
+@pyro.on_callback_query(callback_data_filter("groups_only_unselect_all"))
+@memoize_groups_cache_per_callback
 async def groups_only_unselect_all_callback(client, callback_query):
     """Unselect all regular groups"""
     try:
         uid = callback_query.from_user.id
         await callback_query.answer("Removing all groups...")
         
-        # Fetch groups
-        accounts = db.get_user_accounts(uid)
-        all_groups = []
-        for acc in accounts:
-            try:
-                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                async for dialog in tg_client.iter_dialogs():
-                    if dialog.is_group or dialog.is_channel:
-                        entity = dialog.entity
-                        is_forum = getattr(entity, 'forum', False)
-                        if not is_forum:
-                            all_groups.append({"id": entity.id})
-                break
-            except Exception as e:
-                logger.error(f"Error fetching groups: {e}")
-                continue
+        # Same listing groups_only_mode shows; only fetches from Telegram when the cache is empty
+        cached_groups = await get_groups_from_mongo_cache(uid)
+        all_groups = [g for g in cached_groups if not g.get('is_forum', False)]
         
-        removed_count = 0
-        for group in all_groups:
-            if db.get_target_group(uid, group["id"]):
-                db.remove_target_group(uid, group["id"])
-                removed_count += 1
+        existing = {g["group_id"] for g in db.get_target_groups(uid)}
+        to_remove = [group["id"] for group in all_groups if group["id"] in existing]
+        removed_count = db.bulk_remove_target_groups(uid, to_remove)
         
         await callback_query.answer(f" Removed {removed_count} groups")
         await groups_only_mode_callback(client, callback_query)
@@ -3613,31 +3804,269 @@ async def groups_only_unselect_all_callback(client, callback_query):
         logger.error(f"Error in groups_only_unselect_all: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^forums_only_mode$"))
+FORUM_TOPICS_CONCURRENCY = 8
+
+async def fetch_forum_topics(accounts):
+    """Fetch topics of every forum across all accounts concurrently, one client per account"""
+    async def fetch_account_topics(acc):
+        topics = []
+        try:
+            tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
+            forum_dialogs = [
+                dialog async for dialog in tg_client.iter_dialogs()
+                if (dialog.is_group or dialog.is_channel) and getattr(dialog.entity, 'forum', False)
+            ]
+            
+            # Topic lists are independent per forum; overlap the requests but cap them per client
+            semaphore = asyncio.Semaphore(FORUM_TOPICS_CONCURRENCY)
+            
+            async def fetch_dialog_topics(dialog):
+                async with semaphore:
+                    try:
+                        result = await tg_client(GetForumTopicsRequest(
+                            channel=dialog.entity,
+                            offset_date=0,
+                            offset_id=0,
+                            offset_topic=0,
+                            limit=100
+                        ))
+                    except Exception as e:
+                        logger.error(f"Error fetching topics from {dialog.title}: {e}")
+                        return []
+                return [{
+                    "id": topic.id,
+                    "title": getattr(topic, 'title', f'Topic {topic.id}'),
+                    "forum_id": dialog.entity.id,
+                    "forum_title": dialog.title,
+                    "is_topic": True
+                } for topic in result.topics if isinstance(topic, ForumTopic)]
+            
+            for dialog_topics in await asyncio.gather(*[fetch_dialog_topics(d) for d in forum_dialogs]):
+                topics.extend(dialog_topics)
+            return topics
+        except Exception as e:
+            logger.error(f"Error fetching topics for {acc.get('phone_number')}: {e}")
+            return topics
+
+    results = await asyncio.gather(*[fetch_account_topics(acc) for acc in accounts], return_exceptions=True)
+    
+    # Accounts in the same forum return the same topics; keep the first copy
+    all_topics = []
+    seen = set()
+    for topics in results:
+        if isinstance(topics, list):
+            for topic in topics:
+                key = (topic["forum_id"], topic["id"])
+                if key not in seen:
+                    seen.add(key)
+                    all_topics.append(topic)
+    return all_topics
+
+ACCOUNT_SCAN_CONCURRENCY = 3
+ACCOUNT_SCAN_TIMEOUT = 10
+
+async def count_user_dialog_groups(accounts):
+    """Count groups, forums and forum topics across all accounts.
+    Returns (total_groups, groups_only, forums_only, topics)."""
+    account_semaphore = asyncio.Semaphore(ACCOUNT_SCAN_CONCURRENCY)
+    
+    async def list_account_chats(acc):
+        tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
+        # One request for every joined group and channel, without paging through
+        # dialogs and their last messages
+        result = await tg_client(functions.messages.GetAllChatsRequest(except_ids=[]))
+        return tg_client, [
+            chat for chat in result.chats
+            if isinstance(chat, (types.Chat, types.Channel))
+            and not getattr(chat, 'left', False)
+            and not getattr(chat, 'deactivated', False)
+            and not getattr(chat, 'migrated_to', None)
+        ]
+    
+    async def scan_account(acc):
+        # A slow or unreachable account is left out of the counts rather than holding them up
+        async with account_semaphore:
+            try:
+                return await asyncio.wait_for(list_account_chats(acc), ACCOUNT_SCAN_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Error counting groups for {acc.get('phone_number')}: {e!r}")
+                return None, []
+    
+    scans = await asyncio.gather(*[scan_account(acc) for acc in accounts])
+    
+    # A chat joined by several accounts is counted, and its topics requested, once
+    entities = {}
+    for tg_client, account_entities in scans:
+        for entity in account_entities:
+            entities.setdefault(entity.id, (tg_client, entity))
+    forums = [(tg_client, entity) for tg_client, entity in entities.values() if getattr(entity, 'forum', False)]
+    
+    # Topic counts are independent per forum; overlap the requests but cap them per client
+    semaphores = {}
+    
+    async def count_topics(tg_client, entity):
+        async with semaphores.setdefault(id(tg_client), asyncio.Semaphore(FORUM_TOPICS_CONCURRENCY)):
+            try:
+                # The response carries the total topic count; one topic is enough to get it
+                result = await tg_client(GetForumTopicsRequest(
+                    channel=entity,
+                    offset_date=0,
+                    offset_id=0,
+                    offset_topic=0,
+                    limit=1
+                ))
+                return getattr(result, 'count', len(result.topics))
+            except Exception as e:
+                logger.warning(f"Could not count topics of forum {entity.id}: {e}")
+                return 0
+    
+    topic_counts = await asyncio.gather(*[count_topics(tg_client, entity) for tg_client, entity in forums])
+    return len(entities), len(entities) - len(forums), len(forums), sum(topic_counts)
+
+# The main menu shows the group counts stored on the user document and recounts them
+# in the background once they are older than MENU_GROUP_COUNTS_TTL seconds
+MENU_GROUP_COUNTS_TTL = 900
+MENU_GROUP_COUNTS_REFRESHING = set()
+
+async def refresh_menu_group_counts(uid, accounts=None):
+    """Recount the user's groups, forums and topics and store the counts"""
+    if uid in MENU_GROUP_COUNTS_REFRESHING:
+        return
+    MENU_GROUP_COUNTS_REFRESHING.add(uid)
+    try:
+        if accounts is None:
+            accounts = db.get_user_accounts(uid, fields=("phone_number", "session_string"))
+        counts = await count_user_dialog_groups(accounts) if accounts else (0, 0, 0, 0)
+        db.set_group_counts(uid, counts)
+    except Exception as e:
+        logger.error(f"Error refreshing group counts for {uid}: {e}")
+    finally:
+        MENU_GROUP_COUNTS_REFRESHING.discard(uid)
+
+# uid -> version of the cached topic list; bumped on every reload so pages rendered
+# from an older list are never served again
+FORUM_TOPICS_VERSION = {}
+
+def bump_forum_topics_version(uid):
+    """Retire every topics page rendered for uid"""
+    FORUM_TOPICS_VERSION[uid] = FORUM_TOPICS_VERSION.get(uid, 0) + 1
+
+def forget_forum_topics_version(uid):
+    """Drop uid's version entry; rendered pages are cleared with it, so restarting at 0 serves nothing stale"""
+    FORUM_TOPICS_VERSION.pop(uid, None)
+    render_topics_page.cache_clear()
+
+def cache_forum_topics(uid, topics):
+    """Cache the fetched topic list and retire pages rendered from the previous one"""
+    db.cache_forum_topics(uid, topics)
+    bump_forum_topics_version(uid)
+
+# Static rows of the topic menus, built once and shared by every render
+FORUMS_ONLY_HEADER_ROW = [
+    InlineKeyboardButton("✅ Select All", callback_data="topics_select_all"),
+    InlineKeyboardButton("❌ Unselect All", callback_data="topics_unselect_all")
+]
+FORUMS_ONLY_FOOTER_ROWS = [
+    [InlineKeyboardButton("🔄 Refresh", callback_data="forums_only_mode_refresh")],
+    [InlineKeyboardButton("← Back to Groups Settings", callback_data="menu_groups")]
+]
+TOPICS_HEADER_BUTTONS = [
+    [
+        InlineKeyboardButton("+ Select All", callback_data="topics_select_all"),
+        InlineKeyboardButton("- Unselect All", callback_data="topics_unselect_all")
+    ],
+    [InlineKeyboardButton("? Search Topics", callback_data="search_all_topics")]
+]
+TOPICS_BACK_ROW = [InlineKeyboardButton("x Back", callback_data="both_groups_topics_mode")]
+TOPICS_ONLY_PER_PAGE = 6
+BOTH_MODE_TOPICS_PER_PAGE = 10
+
+@lru_cache(maxsize=256)
+def render_topics_page(uid, page, topics_version, selected_forum_ids, both_mode=False):
+    """Build one page of the topics menu from the topics cache.
+
+    Shared by the topics only and both mode views and cached per topic list
+    version and selection, so repeat visits to a page skip both the cache read
+    and the button building. Returns None when no topics are cached.
+    """
+    items_per_page = BOTH_MODE_TOPICS_PER_PAGE if both_mode else TOPICS_ONLY_PER_PAGE
+    start_idx = page * items_per_page
+    end_idx = start_idx + items_per_page
+    page_topics, total_topics = db.get_cached_forum_topics_page(uid, start_idx, items_per_page)
+    if not total_topics:
+        return None
+    
+    total_pages = (total_topics + items_per_page - 1) // items_per_page
+    
+    if both_mode:
+        menu_text = (
+            f"<b> ALL FORUM TOPICS</b>\n\n"
+            f"Total Topics: <b>{total_topics}</b>\n"
+            f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
+            f"<i>Topics from all forum groups:</i>"
+        )
+        buttons = list(TOPICS_HEADER_BUTTONS)
+        buttons.extend([
+            [InlineKeyboardButton(
+                f" {topic['forum_title'][:15]} > {topic['title'][:20]}",
+                callback_data=f"toggle_topic_{topic['forum_id']}_{topic['id']}"
+            )]
+            for topic in page_topics
+        ])
+        page_prefix, back_label, next_label = "both_topics_page_", "< Back", ">"
+    else:
+        menu_text = (
+            f"<b> TOPICS ONLY MODE</b>\n\n"
+            f"Total Topics: <b>{total_topics}</b>\n"
+            f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
+            f"<i>Select topics to broadcast to.</i>"
+        )
+        buttons = [FORUMS_ONLY_HEADER_ROW]
+        buttons.extend([
+            [InlineKeyboardButton(
+                f"{'✅' if topic['forum_id'] in selected_forum_ids else '⬜'} {topic['title'][:25]} ({topic['forum_title'][:15]})",
+                callback_data=f"toggle_topic_{topic['forum_id']}_{topic['id']}"
+            )]
+            for topic in page_topics
+        ])
+        page_prefix, back_label, next_label = "topics_page_", "◀️ Back", "Next ▶️"
+    
+    # Add pagination buttons
+    nav_buttons = []
+    if page > 0:
+        nav_buttons.append(InlineKeyboardButton(back_label, callback_data=f"{page_prefix}{page - 1}"))
+    if end_idx < total_topics:
+        nav_buttons.append(InlineKeyboardButton(next_label, callback_data=f"{page_prefix}{page + 1}"))
+    if nav_buttons:
+        buttons.append(nav_buttons)
+    
+    if both_mode:
+        buttons.append(TOPICS_BACK_ROW)
+    else:
+        buttons.extend(FORUMS_ONLY_FOOTER_ROWS)
+    return menu_text, InlineKeyboardMarkup(buttons)
+
+@pyro.on_callback_query(filters.regex(r"^(forums_only_mode(_refresh)?|topics_page_(\d+))$"))
 async def forums_only_mode_callback(client, callback_query):
     """Handle topics only mode - show ALL topics directly from all forum groups"""
     try:
         uid = callback_query.from_user.id
         await callback_query.answer("Loading topics...")
         
-        # Get topics from MongoDB cache instead of fetching every time
-        cached_groups = await get_groups_from_mongo_cache(uid)
+        # Select All calls this handler directly, without regex matches; it lands on page 0
+        matches = callback_query.matches
+        page = int(matches[0].group(3) or 0) if matches else 0
         
-        # Filter only topics from forum groups
-        all_topics = []
-        for group in cached_groups:
-            if group.get('is_forum', False) and group.get('topics'):
-                for topic in group['topics']:
-                    all_topics.append({
-                        "id": topic.get('id'),
-                        "title": topic.get('title', f'Topic {topic.get("id")}'),
-                        "forum_id": group.get('id'),
-                        "forum_title": group.get('title'),
-                        "is_topic": True
-                    })
+        # Selected forums decide the ticks, so they are part of the rendered page key
+        selected_forums = db.get_forum_groups(uid) or []
+        selected_forum_ids = frozenset(f.get("group_id") for f in selected_forums)
+        
+        rendered = None
+        if callback_query.data != "forums_only_mode_refresh":
+            rendered = render_topics_page(uid, page, FORUM_TOPICS_VERSION.get(uid, 0), selected_forum_ids)
         
         # If no topics in cache, fetch fresh
-        if not all_topics:
+        if rendered is None:
             accounts = db.get_user_accounts(uid)
             if not accounts:
                 await callback_query.message.reply_text(
@@ -3646,50 +4075,13 @@ async def forums_only_mode_callback(client, callback_query):
                 )
                 return
             
-            # Fetch only once
-            for acc in accounts:
-                tg_client = None
-                try:
-                    tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                    async for dialog in tg_client.iter_dialogs():
-                        if dialog.is_group or dialog.is_channel:
-                            entity = dialog.entity
-                            is_forum = getattr(entity, 'forum', False)
-                            if is_forum:
-                                try:
-                                    result = await tg_client(GetForumTopicsRequest(
-                                        channel=entity,
-                                        offset_date=0,
-                                        offset_id=0,
-                                        offset_topic=0,
-                                        limit=100
-                                    ))
-                                    
-                                    for topic in result.topics:
-                                        if isinstance(topic, ForumTopic):
-                                            all_topics.append({
-                                                "id": topic.id,
-                                                "title": getattr(topic, 'title', f'Topic {topic.id}'),
-                                                "forum_id": entity.id,
-                                                "forum_title": dialog.title,
-                                                "is_topic": True
-                                            })
-                                except Exception as e:
-                                    logger.error(f"Error fetching topics from {dialog.title}: {e}")
-                    
-                    await tg_client.disconnect()
-                    logger.info(f"✓ Loaded {len(all_topics)} topics (fresh fetch)")
-                    break
-                except Exception as e:
-                    logger.error(f"Error fetching topics: {e}")
-                    if tg_client:
-                        try:
-                            await tg_client.disconnect()
-                        except:
-                            pass
-                    continue
+            all_topics = await fetch_forum_topics(accounts)
+            logger.info(f"✓ Loaded {len(all_topics)} topics (fresh fetch)")
+            if all_topics:
+                cache_forum_topics(uid, all_topics)
+                rendered = render_topics_page(uid, page, FORUM_TOPICS_VERSION[uid], selected_forum_ids)
         
-        if not all_topics:
+        if rendered is None:
             await callback_query.message.edit_text(
                 "<b> No Topics Found</b>\n\n"
                 "No topics found in your account.\n\n"
@@ -3701,55 +4093,10 @@ async def forums_only_mode_callback(client, callback_query):
             )
             return
         
-        # Get selected forum groups to check which topics are selected
-        selected_forums = db.get_forum_groups(uid) or []
-        selected_forum_ids = [f.get("group_id") for f in selected_forums]
-        
-        # Pagination setup - 6 per page with next/back buttons
-        page = 0
-        items_per_page = 6
-        start_idx = page * items_per_page
-        end_idx = start_idx + items_per_page
-        total_pages = (len(all_topics) + items_per_page - 1) // items_per_page
-        
-        menu_text = (
-            f"<b> TOPICS ONLY MODE</b>\n\n"
-            f"Total Topics: <b>{len(all_topics)}</b>\n"
-            f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
-            f"<i>Select topics to broadcast to.</i>"
-        )
-        
-        buttons = [
-            [
-                InlineKeyboardButton("✅ Select All", callback_data="topics_select_all"),
-                InlineKeyboardButton("❌ Unselect All", callback_data="topics_unselect_all")
-            ]
-        ]
-        
-        # Add individual topic buttons for current page
-        for topic in all_topics[start_idx:end_idx]:
-            is_selected = topic["forum_id"] in selected_forum_ids
-            emoji = "✅" if is_selected else "⬜"
-            buttons.append([InlineKeyboardButton(
-                f"{emoji} {topic['title'][:25]} ({topic['forum_title'][:15]})",
-                callback_data=f"toggle_topic_{topic['forum_id']}_{topic['id']}"
-            )])
-        
-        # Add pagination buttons (always show both if multiple pages)
-        if total_pages > 1:
-            nav_buttons = []
-            if page > 0:
-                nav_buttons.append(InlineKeyboardButton("◀️ Back", callback_data=f"topics_page_{page - 1}"))
-            if end_idx < len(all_topics):
-                nav_buttons.append(InlineKeyboardButton("Next ▶️", callback_data=f"topics_page_{page + 1}"))
-            if nav_buttons:
-                buttons.append(nav_buttons)
-        
-        buttons.append([InlineKeyboardButton("← Back to Groups Settings", callback_data="menu_groups")])
-        
+        menu_text, reply_markup = rendered
         await callback_query.message.edit_text(
             menu_text,
-            reply_markup=InlineKeyboardMarkup(buttons),
+            reply_markup=reply_markup,
             parse_mode=ParseMode.HTML
         )
         
@@ -3757,64 +4104,63 @@ async def forums_only_mode_callback(client, callback_query):
         logger.error(f"Error in forums_only_mode callback: {e}")
         await callback_query.answer("Error loading forums. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^toggle_topic_"))
+@pyro.on_callback_query(filters.regex(r"^toggle_topic_(-?\d+)_(-?\d+)$"))
 async def toggle_topic_callback(client, callback_query):
     """Toggle topic selection"""
     try:
         uid = callback_query.from_user.id
-        data = callback_query.data.replace("toggle_topic_", "")
-        parts = data.split("_")
-        forum_id = int(parts[0])
-        topic_id = int(parts[1])
+        forum_id = int(callback_query.matches[0].group(1))
         
-        # Check if forum is already selected
-        selected_forums = db.get_forum_groups(uid) or []
-        forum_ids = [f.get("group_id") for f in selected_forums]
+        keyboard = callback_query.message.reply_markup.inline_keyboard
         
-        if forum_id in forum_ids:
-            # Unselect - remove forum
+        # Selection is stored per forum, so every topic button of that forum flips together
+        if db.get_forum_group(uid, forum_id):
             db.remove_forum_group(uid, forum_id)
+            new_emoji, old_emoji = "⬜", "✅"
             await callback_query.answer("✅ Topic unselected")
         else:
-            # Select - add forum
-            db.add_forum_group(uid, forum_id, topic_id, f"Topic {topic_id}")
+            # Button labels truncate the title, so take the full one from the topics cache
+            forum_title = db.get_cached_forum_title(uid, forum_id) or f"Forum {forum_id}"
+            db.add_forum_group(uid, forum_id, forum_title)
+            new_emoji, old_emoji = "✅", "⬜"
             await callback_query.answer("✅ Topic selected")
         
-        # Refresh the list
-        await forums_only_mode_callback(client, callback_query)
+        # Patch the affected buttons instead of rebuilding the whole topic list
+        prefix = f"toggle_topic_{forum_id}_"
+        changed = False
+        for row in keyboard:
+            for button in row:
+                if button.callback_data and button.callback_data.startswith(prefix) \
+                        and button.text.startswith(old_emoji):
+                    button.text = new_emoji + button.text[len(old_emoji):]
+                    changed = True
+        
+        if changed:
+            await callback_query.message.edit_reply_markup(InlineKeyboardMarkup(keyboard))
         
     except Exception as e:
         logger.error(f"Error toggling topic: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^topics_select_all$"))
+@pyro.on_callback_query(callback_data_filter("topics_select_all"))
 async def topics_select_all_callback(client, callback_query):
     """Select all topics - uses cached data to avoid refetching"""
     try:
         uid = callback_query.from_user.id
         
         # Get topics from MongoDB cache instead of fetching
-        cached_groups = await get_groups_from_mongo_cache(uid)
-        
-        # Filter only topics from forum groups
-        all_topics = []
-        for group in cached_groups:
-            if group.get('is_forum', False) and group.get('topics'):
-                for topic in group['topics']:
-                    all_topics.append({
-                        "forum_id": group.get('id'),
-                        "topic_id": topic.get('id'),
-                        "title": topic.get('title', f'Topic {topic.get("id")}')
-                    })
+        all_topics = db.get_cached_forum_topics(uid)
         
         # If no topics in cache, just show message
         if not all_topics:
             await callback_query.answer("⚠️ No topics found in cache. Please refresh cache first.", show_alert=True)
             return
         
-        # Select all topics
+        # Select all topics - selection is stored per forum, so write each forum once
+        forums = {}
         for topic in all_topics:
-            db.add_forum_group(uid, topic["forum_id"], topic["topic_id"], topic["title"])
+            forums.setdefault(topic["forum_id"], {"id": topic["forum_id"], "title": topic.get("forum_title", "Unknown")})
+        db.bulk_add_forum_groups(uid, list(forums.values()))
         
         await callback_query.answer(f"✅ Selected all {len(all_topics)} topics")
         await forums_only_mode_callback(client, callback_query)
@@ -3823,53 +4169,54 @@ async def topics_select_all_callback(client, callback_query):
         logger.error(f"Error in topics select all: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^topics_unselect_all$"))
+@pyro.on_callback_query(callback_data_filter("topics_unselect_all"))
 async def topics_unselect_all_callback(client, callback_query):
     """Unselect all topics"""
     try:
         uid = callback_query.from_user.id
-        db.db.forum_groups.delete_many({"user_id": uid})
+        db.clear_forum_groups(uid)
         await callback_query.answer("✅ All topics unselected")
-        await forums_only_mode_callback(client, callback_query)
+        
+        # Nothing is selected any more, so just clear the ticks on the current keyboard
+        keyboard = callback_query.message.reply_markup.inline_keyboard
+        changed = False
+        for row in keyboard:
+            for button in row:
+                if button.callback_data and button.callback_data.startswith("toggle_topic_") \
+                        and button.text.startswith("✅"):
+                    button.text = "⬜" + button.text[len("✅"):]
+                    changed = True
+        
+        if changed:
+            await callback_query.message.edit_reply_markup(InlineKeyboardMarkup(keyboard))
     except Exception as e:
         logger.error(f"Error in topics unselect all: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^topics_page_"))
-async def topics_page_callback(client, callback_query):
-    """Handle topics pagination"""
-    try:
-        await forums_only_mode_callback(client, callback_query)
-    except Exception as e:
-        logger.error(f"Error in topics pagination: {e}")
-        await callback_query.answer("Error. Try again.", show_alert=True)
-
 @pyro.on_callback_query(filters.regex(r"^forums_page_(\d+)$"))
 async def forums_page_callback(client, callback_query):
     """Handle forums pagination"""
     try:
         uid = callback_query.from_user.id
-        page = int(callback_query.data.split("_")[-1])
+        page = int(callback_query.matches[0].group(1))
         
-        # Use cached forums - NO fetching!
-        cached_data = db.get_cached_groups(uid)
-        forum_groups = cached_data.get("forums", []) if cached_data else []
+        # Use cached forums - NO fetching! Only the visible page is read from Mongo
+        items_per_page = 10
+        total_forums = db.count_groups_menu(uid, True)
         
-        if not forum_groups:
+        if not total_forums:
             await callback_query.answer(" No cached forums. Please go back and reload.", show_alert=True)
             return
         
-        # Forums already loaded from cache, no fetching needed
-        
         # Pagination setup
-        items_per_page = 10
         start_idx = page * items_per_page
         end_idx = start_idx + items_per_page
-        total_pages = (len(forum_groups) + items_per_page - 1) // items_per_page
+        total_pages = (total_forums + items_per_page - 1) // items_per_page
+        forum_groups = db.get_groups_menu_page(uid, True, start_idx, items_per_page)
         
         menu_text = (
             f"<b> FORUMS ONLY MODE</b>\n\n"
-            f"Total Forum Groups: <b>{len(forum_groups)}</b>\n"
+            f"Total Forum Groups: <b>{total_forums}</b>\n"
             f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
             f"<i>Click on a forum to view and select topics.</i>"
         )
@@ -3879,7 +4226,7 @@ async def forums_page_callback(client, callback_query):
         ]
         
         # Add forum group buttons for current page
-        for forum in forum_groups[start_idx:end_idx]:
+        for forum in forum_groups:
             buttons.append([InlineKeyboardButton(
                 f" {forum['title'][:30]}",
                 callback_data=f"view_forum_topics_{forum['id']}"
@@ -3889,7 +4236,7 @@ async def forums_page_callback(client, callback_query):
         nav_buttons = []
         if page > 0:
             nav_buttons.append(InlineKeyboardButton("< Back", callback_data=f"forums_page_{page - 1}"))
-        if end_idx < len(forum_groups):
+        if end_idx < total_forums:
             nav_buttons.append(InlineKeyboardButton(">", callback_data=f"forums_page_{page + 1}"))
         
         if nav_buttons:
@@ -3907,29 +4254,55 @@ async def forums_page_callback(client, callback_query):
         logger.error(f"Error in forums_page callback: {e}")
         await callback_query.answer("Error loading page. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^view_forum_topics_(.+)$"))
-async def view_forum_topics_callback(client, callback_query):
-    """View topics in a specific forum group"""
-    try:
-        uid = callback_query.from_user.id
-        forum_id = int(callback_query.data.split("_")[-1])
-        await callback_query.answer("Loading topics...")
-        
-        # Get forum entity and fetch topics
-        accounts = db.get_user_accounts(uid)
-        forum_title = "Forum"
-        topics = []
-        
-        for acc in accounts:
-            tg_client = None
-            try:
-                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                
-                # Use PeerChannel instead of raw ID to avoid PeerUser confusion
-                entity = await tg_client.get_entity(PeerChannel(abs(forum_id)))
-                forum_title = entity.title
-                
-                # Fetch topics
+# (uid, phone_number, forum_id) -> (channel entity, expires_at); access hashes are per account
+FORUM_ENTITY_CACHE = {}
+FORUM_ENTITY_TTL = 600
+FORUM_ENTITY_CACHE_MAX_ENTRIES = 2000
+
+def evict_forum_entities(uid):
+    """Drop every cached forum entity resolved for uid's accounts"""
+    for key in [key for key in FORUM_ENTITY_CACHE if key[0] == uid]:
+        del FORUM_ENTITY_CACHE[key]
+
+async def get_forum_entity(tg_client, uid, phone_number, forum_id):
+    """Resolve a forum's channel entity (cached for FORUM_ENTITY_TTL seconds)"""
+    key = (uid, phone_number, forum_id)
+    cached = FORUM_ENTITY_CACHE.pop(key, None)
+    if cached and cached[1] > time.monotonic():
+        FORUM_ENTITY_CACHE[key] = cached
+        return cached[0]
+    # Use PeerChannel instead of raw ID to avoid PeerUser confusion
+    entity = await tg_client.get_entity(PeerChannel(abs(forum_id)))
+    # Dicts keep insertion order, so the first key is the least recently used
+    while len(FORUM_ENTITY_CACHE) >= FORUM_ENTITY_CACHE_MAX_ENTRIES:
+        del FORUM_ENTITY_CACHE[next(iter(FORUM_ENTITY_CACHE))]
+    FORUM_ENTITY_CACHE[key] = (entity, time.monotonic() + FORUM_ENTITY_TTL)
+    return entity
+
+async def fetch_forum_topic_list(uid, forum_id, expected_topics=None):
+    """Fetch one forum's title and topics from the first account that can see it"""
+    accounts = db.get_user_accounts(uid)
+    # Size the request from the cached topic count; a full page means there may be more
+    limit = min(100, expected_topics + 10) if expected_topics else 100
+    forum_title = "Forum"
+    topics = []
+    
+    for acc in accounts:
+        try:
+            tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
+            
+            entity = await get_forum_entity(tg_client, uid, acc["phone_number"], forum_id)
+            forum_title = entity.title
+            
+            # Fetch topics
+            result = await tg_client(GetForumTopicsRequest(
+                channel=entity,
+                offset_date=0,
+                offset_id=0,
+                offset_topic=0,
+                limit=limit
+            ))
+            if limit < 100 and len(result.topics) >= limit:
                 result = await tg_client(GetForumTopicsRequest(
                     channel=entity,
                     offset_date=0,
@@ -3937,72 +4310,108 @@ async def view_forum_topics_callback(client, callback_query):
                     offset_topic=0,
                     limit=100
                 ))
-                
-                for topic in result.topics:
-                    if isinstance(topic, ForumTopic):
-                        topics.append({
-                            "id": topic.id,
-                            "title": getattr(topic, 'title', f'Topic {topic.id}'),
-                            "forum_id": forum_id
-                        })
-                
-                await tg_client.disconnect()
-                logger.info(f"✓ Loaded {len(topics)} topics from {forum_title}")
-                break
-            except Exception as e:
-                logger.error(f"Error fetching topics: {e}")
-                if tg_client:
-                    try:
-                        await tg_client.disconnect()
-                    except:
-                        pass
-                continue
-        
-        if not topics:
-            await callback_query.message.edit_text(
-                f"<b> No Topics Found</b>\n\n"
-                f"Forum: <b>{forum_title}</b>\n\n"
-                f"No topics found in this forum.",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("x Back to Forums", callback_data="forums_only_mode")]
-                ]),
-                parse_mode=ParseMode.HTML
-            )
-            return
-        
-        # Get selected forum groups
-        selected_forum_ids = [f["id"] for f in db.get_forum_groups(uid)]
-        is_forum_selected = forum_id in selected_forum_ids
-        
-        menu_text = (
-            f"<b> {forum_title}</b>\n\n"
-            f"Total Topics: <b>{len(topics)}</b>\n"
-            f"Forum Status: {' Selected' if is_forum_selected else ' Not Selected'}\n\n"
-            f"<i>Select topics to broadcast to:</i>"
+            
+            for topic in result.topics:
+                if isinstance(topic, ForumTopic):
+                    topics.append({
+                        "id": topic.id,
+                        "title": getattr(topic, 'title', f'Topic {topic.id}'),
+                        "forum_id": forum_id,
+                        "forum_title": forum_title,
+                        "is_topic": True
+                    })
+            
+            logger.info(f"✓ Loaded {len(topics)} topics from {forum_title}")
+            break
+        except Exception as e:
+            # The cached entity may be stale (left the forum, channel invalid): resolve again next time
+            FORUM_ENTITY_CACHE.pop((uid, acc["phone_number"], forum_id), None)
+            logger.error(f"Error fetching topics: {e}")
+            continue
+    
+    return forum_title, topics
+
+async def render_forum_topics(message, uid, forum_id, forum_title, topics):
+    """Render the topics view of one forum"""
+    if not topics:
+        await message.edit_text(
+            f"<b> No Topics Found</b>\n\n"
+            f"Forum: <b>{forum_title}</b>\n\n"
+            f"No topics found in this forum.",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("x Back to Forums", callback_data="forums_only_mode")]
+            ]),
+            parse_mode=ParseMode.HTML
         )
-        
-        buttons = [
-            [
-                InlineKeyboardButton("+ Select All Topics", callback_data=f"forum_select_all_{forum_id}"),
-                InlineKeyboardButton("- Unselect All", callback_data=f"forum_unselect_all_{forum_id}")
-            ],
-            [InlineKeyboardButton("x Back to Forums", callback_data="forums_only_mode")]
-        ]
-        
-        # Note: Topic selection would require database changes to store selected topics
-        # For now, selecting forum = selecting all its topics
-        
-        await callback_query.message.edit_text(
+        return
+    
+    # Get selected forum groups
+    is_forum_selected = bool(db.get_forum_group(uid, forum_id))
+    
+    menu_text = (
+        f"<b> {forum_title}</b>\n\n"
+        f"Total Topics: <b>{len(topics)}</b>\n"
+        f"Forum Status: {' Selected' if is_forum_selected else ' Not Selected'}\n\n"
+        f"<i>Select topics to broadcast to:</i>"
+    )
+    
+    buttons = [
+        [
+            InlineKeyboardButton("+ Select All Topics", callback_data=f"forum_select_all_{forum_id}"),
+            InlineKeyboardButton("- Unselect All", callback_data=f"forum_unselect_all_{forum_id}")
+        ],
+        [InlineKeyboardButton("x Back to Forums", callback_data="forums_only_mode")]
+    ]
+    
+    # Note: Topic selection would require database changes to store selected topics
+    # For now, selecting forum = selecting all its topics
+    
+    try:
+        await message.edit_text(
             menu_text,
             reply_markup=InlineKeyboardMarkup(buttons),
             parse_mode=ParseMode.HTML
         )
+    except MessageNotModified:
+        pass
+
+async def refresh_forum_topics_view(uid, forum_id, message, expected_topics=None):
+    """Background refresh of a forum view that was first rendered from the topics cache"""
+    try:
+        forum_title, topics = await fetch_forum_topic_list(uid, forum_id, expected_topics)
+        if not topics:
+            return
+        # Swap only this forum's topics so overlapping refreshes of other forums are kept
+        db.replace_cached_forum_topics(uid, forum_id, forum_title, topics)
+        bump_forum_topics_version(uid)
+        await render_forum_topics(message, uid, forum_id, forum_title, topics)
+    except Exception as e:
+        logger.error(f"Error refreshing forum {forum_id} topics for {uid}: {e}")
+
+@pyro.on_callback_query(filters.regex(r"^view_forum_topics_(-?\d+)$"))
+async def view_forum_topics_callback(client, callback_query):
+    """View topics in a specific forum group"""
+    try:
+        uid = callback_query.from_user.id
+        forum_id = int(callback_query.matches[0].group(1))
+        await callback_query.answer("Loading topics...")
+        
+        # Show cached topics right away and refresh from Telegram behind the rendered menu
+        cached_topics = [t for t in db.get_cached_forum_topics(uid) if t.get("forum_id") == forum_id]
+        if cached_topics:
+            forum_title = cached_topics[0].get("forum_title") or "Forum"
+            await render_forum_topics(callback_query.message, uid, forum_id, forum_title, cached_topics)
+            spawn_background_task(refresh_forum_topics_view(uid, forum_id, callback_query.message, len(cached_topics)))
+            return
+        
+        forum_title, topics = await fetch_forum_topic_list(uid, forum_id)
+        await render_forum_topics(callback_query.message, uid, forum_id, forum_title, topics)
         
     except Exception as e:
         logger.error(f"Error in view_forum_topics callback: {e}")
         await callback_query.answer("Error loading topics. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^menu_groups_mode$"))
+@pyro.on_callback_query(callback_data_filter("menu_groups_mode"))
 async def menu_groups_mode_callback(client, callback_query):
     """Handle groups mode menu"""
     try:
@@ -4069,8 +4478,7 @@ async def set_broadcast_mode_callback(client, callback_query):
             # Set cycle interval to 3600s (1 hour) for Topics Only
             db.set_user_ad_delay(uid, 3600)
             # Set group message delay to 10s for Topics Only
-            if hasattr(db, 'set_user_group_msg_delay'):
-                db.set_user_group_msg_delay(uid, 10)
+            db.set_user_group_msg_delay(uid, 10)
             logger.info(f"[TOPICS MODE] Set cycle interval=3600s, message delay=10s for user {uid}")
         
         mode_names = {
@@ -4088,125 +4496,49 @@ async def set_broadcast_mode_callback(client, callback_query):
         logger.error(f"Error in set_broadcast_mode callback: {e}")
         await callback_query.answer("Error setting mode. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^both_mode_groups$"))
-async def both_mode_groups_callback(client, callback_query):
-    """Show groups in both mode"""
-    await groups_only_mode_callback(client, callback_query)
-
-@pyro.on_callback_query(filters.regex("^both_mode_topics$"))
+@pyro.on_callback_query(filters.regex(r"^(both_mode_topics|both_topics_page_(\d+))$"))
 async def both_mode_topics_callback(client, callback_query):
     """Show topics in both mode"""
     try:
         uid = callback_query.from_user.id
         await callback_query.answer("Loading all topics...")
+        page_turn = callback_query.matches[0].group(2)
+        page = int(page_turn or 0)
         
-        # Fetch all forum groups and their topics
-        accounts = db.get_user_accounts(uid)
-        if not accounts:
-            await callback_query.message.reply_text(
-                " No accounts found. Please add an account first.",
-                parse_mode=ParseMode.HTML
-            )
-            return
+        # Page turns (including back to page 0) are served from the topics cache; opening the view reloads it
+        rendered = None
+        if page_turn is not None:
+            rendered = render_topics_page(uid, page, FORUM_TOPICS_VERSION.get(uid, 0), frozenset(), True)
         
-        all_topics = []
-        for acc in accounts:
-            tg_client = None
-            try:
-                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                async for dialog in tg_client.iter_dialogs():
-                    if dialog.is_group or dialog.is_channel:
-                        entity = dialog.entity
-                        is_forum = getattr(entity, 'forum', False)
-                        if is_forum:
-                            # Fetch topics for this forum
-                            try:
-                                result = await tg_client(GetForumTopicsRequest(
-                                    channel=entity,
-                                    offset_date=0,
-                                    offset_id=0,
-                                    offset_topic=0,
-                                    limit=100
-                                ))
-                                
-                                for topic in result.topics:
-                                    if isinstance(topic, ForumTopic):
-                                        all_topics.append({
-                                            "id": topic.id,
-                                            "title": getattr(topic, 'title', f'Topic {topic.id}'),
-                                            "forum_id": entity.id,
-                                            "forum_title": dialog.title
-                                        })
-                            except Exception as e:
-                                logger.error(f"Error fetching topics from {dialog.title}: {e}")
-                
-                await tg_client.disconnect()
-                logger.info(f"✓ Loaded {len(all_topics)} topics from all forums")
-                break
-            except Exception as e:
-                logger.error(f"Error fetching forums: {e}")
-                if tg_client:
-                    try:
-                        await tg_client.disconnect()
-                    except:
-                        pass
-                continue
+        if rendered is None:
+            # Fetch all forum groups and their topics
+            accounts = db.get_user_accounts(uid)
+            if not accounts:
+                await callback_query.message.reply_text(
+                    " No accounts found. Please add an account first.",
+                    parse_mode=ParseMode.HTML
+                )
+                return
+            
+            all_topics = await fetch_forum_topics(accounts)
+            logger.info(f"✓ Loaded {len(all_topics)} topics from all forums")
+            if all_topics:
+                cache_forum_topics(uid, all_topics)
+                rendered = render_topics_page(uid, page, FORUM_TOPICS_VERSION[uid], frozenset(), True)
         
-        if not all_topics:
+        if rendered is None:
             await callback_query.message.edit_text(
                 "<b> No Topics Found</b>\n\n"
                 "No topics found in your account.",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("x Back", callback_data="both_groups_topics_mode")]
-                ]),
+                reply_markup=InlineKeyboardMarkup([TOPICS_BACK_ROW]),
                 parse_mode=ParseMode.HTML
             )
             return
         
-        # Pagination setup
-        page = 0  # Default to first page
-        items_per_page = 10
-        start_idx = page * items_per_page
-        end_idx = start_idx + items_per_page
-        total_pages = (len(all_topics) + items_per_page - 1) // items_per_page
-        
-        menu_text = (
-            f"<b> ALL FORUM TOPICS</b>\n\n"
-            f"Total Topics: <b>{len(all_topics)}</b>\n"
-            f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
-            f"<i>Topics from all forum groups:</i>"
-        )
-        
-        buttons = [
-            [
-                InlineKeyboardButton("+ Select All", callback_data="topics_select_all"),
-                InlineKeyboardButton("- Unselect All", callback_data="topics_unselect_all")
-            ],
-            [InlineKeyboardButton("? Search Topics", callback_data="search_all_topics")]
-        ]
-        
-        # Show topics for current page
-        for topic in all_topics[start_idx:end_idx]:
-            buttons.append([InlineKeyboardButton(
-                f" {topic['forum_title'][:15]} > {topic['title'][:20]}",
-                callback_data=f"toggle_topic_{topic['forum_id']}_{topic['id']}"
-            )])
-        
-        # Add pagination buttons
-        nav_buttons = []
-        if page > 0:
-            nav_buttons.append(InlineKeyboardButton("< Back", callback_data=f"topics_page_{page - 1}"))
-        if end_idx < len(all_topics):
-            nav_buttons.append(InlineKeyboardButton(">", callback_data=f"topics_page_{page + 1}"))
-        
-        if nav_buttons:
-            buttons.append(nav_buttons)
-        
-        buttons.append([InlineKeyboardButton("x Back", callback_data="both_groups_topics_mode")])
-        
+        menu_text, reply_markup = rendered
         await callback_query.message.edit_text(
             menu_text,
-            reply_markup=InlineKeyboardMarkup(buttons),
+            reply_markup=reply_markup,
             parse_mode=ParseMode.HTML
         )
         
@@ -4214,74 +4546,7 @@ async def both_mode_topics_callback(client, callback_query):
         logger.error(f"Error in both_mode_topics callback: {e}")
         await callback_query.answer("Error loading topics. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex(r"^topics_page_(\d+)$"))
-async def topics_page_callback(client, callback_query):
-    """Handle topics pagination"""
-    try:
-        uid = callback_query.from_user.id
-        page = int(callback_query.data.split("_")[-1])
-        
-        # Use cached topics - NO fetching!
-        cached_data = db.get_cached_groups(uid)
-        all_topics = cached_data.get("topics", []) if cached_data else []
-        
-        if not all_topics:
-            await callback_query.answer(" No cached topics. Please go back and reload.", show_alert=True)
-            return
-        
-        # Topics already loaded from cache, no fetching needed
-        
-        # Pagination setup
-        items_per_page = 10
-        start_idx = page * items_per_page
-        end_idx = start_idx + items_per_page
-        total_pages = (len(all_topics) + items_per_page - 1) // items_per_page
-        
-        menu_text = (
-            f"<b> ALL FORUM TOPICS</b>\n\n"
-            f"Total Topics: <b>{len(all_topics)}</b>\n"
-            f"Page: <b>{page + 1}/{total_pages}</b>\n\n"
-            f"<i>Topics from all forum groups:</i>"
-        )
-        
-        buttons = [
-            [
-                InlineKeyboardButton("+ Select All", callback_data="topics_select_all"),
-                InlineKeyboardButton("- Unselect All", callback_data="topics_unselect_all")
-            ],
-            [InlineKeyboardButton("? Search Topics", callback_data="search_all_topics")]
-        ]
-        
-        # Show topics for current page
-        for topic in all_topics[start_idx:end_idx]:
-            buttons.append([InlineKeyboardButton(
-                f" {topic['forum_title'][:15]} > {topic['title'][:20]}",
-                callback_data=f"toggle_topic_{topic['forum_id']}_{topic['id']}"
-            )])
-        
-        # Add pagination buttons
-        nav_buttons = []
-        if page > 0:
-            nav_buttons.append(InlineKeyboardButton("< Back", callback_data=f"topics_page_{page - 1}"))
-        if end_idx < len(all_topics):
-            nav_buttons.append(InlineKeyboardButton(">", callback_data=f"topics_page_{page + 1}"))
-        
-        if nav_buttons:
-            buttons.append(nav_buttons)
-        
-        buttons.append([InlineKeyboardButton("x Back", callback_data="both_groups_topics_mode")])
-        
-        await callback_query.message.edit_text(
-            menu_text,
-            reply_markup=InlineKeyboardMarkup(buttons),
-            parse_mode=ParseMode.HTML
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in topics_page callback: {e}")
-        await callback_query.answer("Error loading page. Try again.", show_alert=True)
-
-@pyro.on_callback_query(filters.regex("^search_all_topics$"))
+@pyro.on_callback_query(callback_data_filter("search_all_topics"))
 async def search_all_topics_callback(client, callback_query):
     """Handle search all topics"""
     try:
@@ -4302,7 +4567,7 @@ async def search_all_topics_callback(client, callback_query):
         logger.error(f"Error in search_all_topics callback: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^search_forum_topics$"))
+@pyro.on_callback_query(callback_data_filter("search_forum_topics"))
 async def search_forum_topics_callback(client, callback_query):
     """Handle search forum topics"""
     try:
@@ -4323,15 +4588,16 @@ async def search_forum_topics_callback(client, callback_query):
         logger.error(f"Error in search_forum_topics callback: {e}")
         await callback_query.answer("Error. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^menu_ads_forward_mode$"))
-async def menu_ads_forward_mode_callback(client, callback_query):
+@pyro.on_callback_query(callback_data_filter("menu_ads_forward_mode"))
+async def menu_ads_forward_mode_callback(client, callback_query, post_link_data=None):
     """Handle ads forward mode menu"""
     try:
         uid = callback_query.from_user.id
         await callback_query.answer()
         
-        # Get current message source
-        post_link_data = db.get_user_post_link(uid)
+        # Get current message source (callers that just updated it pass it in)
+        if post_link_data is None:
+            post_link_data = db.get_user_post_link(uid)
         if post_link_data and post_link_data.get("message_source") == "post_link":
             current_mode = "post_link"
             post_link = post_link_data.get("post_link", "Not Set")
@@ -4340,14 +4606,11 @@ async def menu_ads_forward_mode_callback(client, callback_query):
             post_link = "Not Set"
         
         # Build menu text - hide post link line when in saved messages mode
-        menu_text = f"<b> ADS FORWARD MODE</b>\n\n"
-        menu_text += f"Current Mode: <b>{' Post Link' if current_mode == 'post_link' else ' Saved Messages'}</b>\n"
-        
-        # Only show post link if in post_link mode
-        if current_mode == 'post_link':
-            menu_text += f"Post Link: <code>{post_link}</code>\n"
-        
-        menu_text += (
+        post_link_line = f"Post Link: <code>{post_link}</code>\n" if current_mode == 'post_link' else ""
+        menu_text = (
+            f"<b> ADS FORWARD MODE</b>\n\n"
+            f"Current Mode: <b>{' Post Link' if current_mode == 'post_link' else ' Saved Messages'}</b>\n"
+            f"{post_link_line}"
             f"\n<b>Modes:</b>\n"
             f"• <b>Saved Messages:</b> Forward from your Saved Messages\n"
             f"• <b>Post Link:</b> Forward from a specific Telegram post\n\n"
@@ -4376,6 +4639,8 @@ async def menu_ads_forward_mode_callback(client, callback_query):
         logger.error(f"Error in menu_ads_forward_mode callback: {e}")
         await callback_query.answer("Error loading forward modes. Try again.", show_alert=True)
 
+FORWARD_MODE_LABELS = {"saved_messages": "Saved Messages", "post_link": "Post Link"}
+
 @pyro.on_callback_query(filters.regex("^set_forward_mode_(.+)$"))
 async def set_forward_mode_callback(client, callback_query):
     """Set ads forward mode"""
@@ -4383,25 +4648,18 @@ async def set_forward_mode_callback(client, callback_query):
         uid = callback_query.from_user.id
         mode = callback_query.data.replace("set_forward_mode_", "")
         
-        if mode == "saved_messages":
+        # Clicking the active mode is answered from a read, without rewriting the same value
+        post_link_data = db.get_user_post_link(uid)
+        if post_link_data and post_link_data["message_source"] == mode and (mode != "post_link" or post_link_data["post_link"]):
+            await callback_query.answer(f" Already using {FORWARD_MODE_LABELS.get(mode, mode)}")
+        elif mode == "saved_messages":
             # Switch to saved messages - keep post link data, just change mode
-            post_link_data = db.get_user_post_link(uid)
-            if post_link_data:
-                # Update only the message_source, preserve post_link data
-                db.db.users.update_one(
-                    {"user_id": uid},
-                    {"$set": {"message_source": "saved_messages"}}
-                )
+            post_link_data = db.set_message_source(uid, "saved_messages")
             await callback_query.answer(" Switched to Saved Messages")
         elif mode == "post_link":
-            # Check if post link is set
-            post_link_data = db.get_user_post_link(uid)
-            if post_link_data and post_link_data.get("post_link"):
-                # Re-enable post link mode
-                db.db.users.update_one(
-                    {"user_id": uid},
-                    {"$set": {"message_source": "post_link"}}
-                )
+            # Re-enable post link mode, only if a post link is set
+            post_link_data = db.set_message_source(uid, "post_link", require_post_link=True)
+            if post_link_data:
                 await callback_query.answer(" Switched to Post Link")
             else:
                 await callback_query.answer(" No post link set! Set one first.", show_alert=True)
@@ -4417,14 +4675,41 @@ async def set_forward_mode_callback(client, callback_query):
                 )
                 return
         
-        # Refresh menu
-        await menu_ads_forward_mode_callback(client, callback_query)
+        # Refresh menu from the updated document instead of reading it again
+        await menu_ads_forward_mode_callback(client, callback_query, post_link_data)
         
     except Exception as e:
         logger.error(f"Error in set_forward_mode callback: {e}")
         await callback_query.answer("Error setting mode. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^menu_interval_management$"))
+@lru_cache(maxsize=256)
+def interval_menu_text(cycle_interval, cycle_timeout, group_msg_delay):
+    """Render the interval management text once per distinct settings tuple"""
+    return (
+        f"<b> INTERVAL MANAGEMENT</b>\n\n"
+        f"<b>Current Settings:</b>\n"
+        f"• Cycle Interval: <b>{cycle_interval}s</b>\n"
+        f"• Cycle Timeout: <b>{cycle_timeout//60}min</b>\n"
+        f"• Group Message Delay: <b>{group_msg_delay}s</b>\n\n"
+        f"<b>ℹ️ About:</b>\n"
+        f"• <b>Cycle Interval:</b> Time between broadcast cycles\n"
+        f"• <b>Cycle Timeout:</b> Maximum time for one cycle\n"
+        f"• <b>Group Message Delay:</b> Delay between messages to groups\n\n"
+        f"<i>Click below to change settings:</i>"
+    )
+
+@lru_cache(maxsize=256)
+def saved_messages_menu_text(saved_msg_count):
+    """Render the saved message management text once per distinct count"""
+    return (
+        f"<b> SAVED MESSAGE MANAGEMENT</b>\n\n"
+        f"Current Messages Count: <b>{saved_msg_count}</b>\n\n"
+        f"<b>ℹ️ About:</b>\n"
+        f"The bot will rotate through the last <b>{saved_msg_count}</b> messages from your Saved Messages.\n\n"
+        f"<i>Change the count below:</i>"
+    )
+
+@pyro.on_callback_query(callback_data_filter("menu_interval_management"))
 async def menu_interval_management_callback(client, callback_query):
     """Handle interval management menu"""
     try:
@@ -4432,23 +4717,12 @@ async def menu_interval_management_callback(client, callback_query):
         await callback_query.answer()
         
         # Get current settings
-        user = db.get_user(uid)
+        user = db.get_user(uid, ("ad_delay", "cycle_timeout", "group_msg_delay")) or {}
         cycle_interval = user.get("ad_delay", 300)
         cycle_timeout = user.get("cycle_timeout", 900)
         group_msg_delay = user.get("group_msg_delay", 15)
         
-        menu_text = (
-            f"<b> INTERVAL MANAGEMENT</b>\n\n"
-            f"<b>Current Settings:</b>\n"
-            f"• Cycle Interval: <b>{cycle_interval}s</b>\n"
-            f"• Cycle Timeout: <b>{cycle_timeout//60}min</b>\n"
-            f"• Group Message Delay: <b>{group_msg_delay}s</b>\n\n"
-            f"<b>ℹ️ About:</b>\n"
-            f"• <b>Cycle Interval:</b> Time between broadcast cycles\n"
-            f"• <b>Cycle Timeout:</b> Maximum time for one cycle\n"
-            f"• <b>Group Message Delay:</b> Delay between messages to groups\n\n"
-            f"<i>Click below to change settings:</i>"
-        )
+        menu_text = interval_menu_text(cycle_interval, cycle_timeout, group_msg_delay)
         
         buttons = [
             [InlineKeyboardButton("⏱ Set Cycle Interval", callback_data="set_ad_delay")],
@@ -4467,7 +4741,7 @@ async def menu_interval_management_callback(client, callback_query):
         logger.error(f"Error in menu_interval_management callback: {e}")
         await callback_query.answer("Error loading interval management menu. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^menu_saved_messages$"))
+@pyro.on_callback_query(callback_data_filter("menu_saved_messages"))
 async def menu_saved_messages_callback(client, callback_query):
     """Handle saved message management menu"""
     try:
@@ -4477,13 +4751,7 @@ async def menu_saved_messages_callback(client, callback_query):
         # Get current saved messages count
         saved_msg_count = db.get_user_saved_messages_count(uid)
         
-        menu_text = (
-            f"<b> SAVED MESSAGE MANAGEMENT</b>\n\n"
-            f"Current Messages Count: <b>{saved_msg_count}</b>\n\n"
-            f"<b>ℹ️ About:</b>\n"
-            f"The bot will rotate through the last <b>{saved_msg_count}</b> messages from your Saved Messages.\n\n"
-            f"<i>Change the count below:</i>"
-        )
+        menu_text = saved_messages_menu_text(saved_msg_count)
         
         buttons = [
             [InlineKeyboardButton("★ Select Saved Messages Count", callback_data="select_saved_messages_count")],
@@ -4500,7 +4768,7 @@ async def menu_saved_messages_callback(client, callback_query):
         logger.error(f"Error in menu_saved_messages callback: {e}")
         await callback_query.answer("Error loading saved messages menu. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^search_groups$"))
+@pyro.on_callback_query(callback_data_filter("search_groups"))
 async def search_groups_callback(client, callback_query):
     """Handle search groups callback"""
     try:
@@ -4521,7 +4789,7 @@ async def search_groups_callback(client, callback_query):
         logger.error(f"Error in search_groups callback: {e}")
         await callback_query.answer("Error initiating search. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^clear_search_filter$"))
+@pyro.on_callback_query(callback_data_filter("clear_search_filter"))
 async def clear_search_filter_callback(client, callback_query):
     """Handle clear search filter callback"""
     try:
@@ -4541,218 +4809,172 @@ async def clear_search_filter_callback(client, callback_query):
         logger.error(f"Error in clear_search_filter callback: {e}")
         await callback_query.answer("Error clearing filter. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^add_forums_only$"))
-async def add_forums_only_callback(client, callback_query):
-    """Handle add forums only callback"""
+# uid -> (groups from all of the user's accounts' dialogs, expires_at)
+USER_DIALOG_GROUPS_CACHE = {}
+USER_DIALOG_GROUPS_TTL = 60
+
+def invalidate_user_dialog_caches(uid):
+    """Drop the user's cached dialog scan, groups menu, forum entities and topic pages after their accounts or groups change"""
+    USER_DIALOG_GROUPS_CACHE.pop(uid, None)
+    GROUPS_MENU_MEMORY_CACHE.pop(uid, None)
+    evict_forum_entities(uid)
+    forget_forum_topics_version(uid)
+
+async def fetch_account_dialog_groups(acc):
+    """Groups and channels in one account's dialogs"""
+    try:
+        tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
+        return [
+            GroupRow(dialog.entity.id, dialog.title, getattr(dialog.entity, 'forum', False))
+            async for dialog in tg_client.iter_dialogs()
+            if dialog.is_group or dialog.is_channel
+        ]
+    except Exception as e:
+        logger.error(f"Error fetching groups from account {acc.get('phone_number')}: {e}")
+        return []
+
+async def fetch_user_dialog_groups(uid, accounts):
+    """Groups and channels across all of the user's accounts, scanned concurrently and
+    deduplicated by id; back-to-back bulk actions share one scan"""
+    cached = USER_DIALOG_GROUPS_CACHE.get(uid)
+    if cached:
+        if cached[1] > time.monotonic():
+            return cached[0]
+        USER_DIALOG_GROUPS_CACHE.pop(uid, None)
+    
+    results = await asyncio.gather(*(fetch_account_dialog_groups(acc) for acc in accounts))
+    all_groups = list({g.id: g for groups in results for g in groups}.values())
+    
+    if all_groups:
+        USER_DIALOG_GROUPS_CACHE[uid] = (all_groups, time.monotonic() + USER_DIALOG_GROUPS_TTL)
+    return all_groups
+
+async def run_filtered_bulk_group_action(client, uid, action, result_text, error_text, forums_only=False):
+    """Fetch groups, apply the search filter and a bulk action, then report in a new message"""
     try:
-        uid = callback_query.from_user.id
-        await callback_query.answer("Fetching groups and adding forums...")
+        forum_only_mode = get_forum_only_mode(uid)
         
-        user = db.db.users.find_one({"user_id": uid})
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
-        
-        # Fetch fresh groups from user's accounts
-        accounts = db.get_user_accounts(uid)
+        # Fetch fresh groups from user's accounts; only the fields needed to connect
+        accounts = db.get_user_accounts(uid, fields=("phone_number", "session_string"))
         if not accounts:
-            await callback_query.message.reply_text(
-                " No accounts found. Please add an account first.",
-                parse_mode=ParseMode.HTML
-            )
+            await client.send_message(uid, " No accounts found. Please add an account first.", parse_mode=ParseMode.HTML)
             return
         
-        # Get groups from first account (fresh fetch)
-        all_groups = []
-        for acc in accounts:
-            try:
-                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                async for dialog in tg_client.iter_dialogs():
-                    if dialog.is_group or dialog.is_channel:
-                        entity = dialog.entity
-                        group_data = {
-                            "id": entity.id,
-                            "title": dialog.title,
-                            "is_forum": getattr(entity, 'forum', False)
-                        }
-                        all_groups.append(group_data)
-                break  # Use first account only
-            except Exception as e:
-                logger.error(f"Error fetching groups from account: {e}")
-                continue
+        all_groups = await fetch_user_dialog_groups(uid, accounts)
+        if forums_only:
+            # Drop non-forum chats before the keyword scan rather than after it
+            all_groups = [g for g in all_groups if g.is_forum]
         
         if not all_groups:
-            await callback_query.message.reply_text(
-                " No groups found in your accounts.",
-                parse_mode=ParseMode.HTML
-            )
+            await client.send_message(uid, " No groups found in your accounts.", parse_mode=ParseMode.HTML)
             return
         
         # Apply search filter if exists
         search_filter = db.get_group_search_filter(uid)
         filtered_groups = filter_groups_by_keyword(all_groups, search_filter)
         
-        # Bulk add forums only
-        added_count = bulk_select_forums_only(uid, filtered_groups, forum_only_mode)
+        count = action(uid, filtered_groups, forum_only_mode)
         
-        await callback_query.message.reply_text(
-            f"<b> Added {added_count} Forum Groups</b>\n\n"
-            f"Fetched fresh from your Telegram account.",
+        filter_text = f" (filtered by '{search_filter}')" if search_filter else ""
+        await client.send_message(
+            uid,
+            result_text.format(count=count, filter_text=filter_text),
             parse_mode=ParseMode.HTML
         )
         
+    except Exception as e:
+        logger.error(f"Error in bulk group action {action.__name__} for {uid}: {e}")
+        try:
+            await client.send_message(uid, error_text)
+        except Exception:
+            pass
+
+# uids with a bulk group action in flight; a second tap must not interleave its writes
+BULK_GROUP_ACTION_USERS = set()
+
+def start_bulk_group_action(client, uid, *args, **kwargs):
+    """Run a filtered bulk group action in the background; False if one is already running for uid"""
+    if uid in BULK_GROUP_ACTION_USERS:
+        return False
+    BULK_GROUP_ACTION_USERS.add(uid)
+    task = spawn_background_task(run_filtered_bulk_group_action(client, uid, *args, **kwargs))
+    task.add_done_callback(lambda _: BULK_GROUP_ACTION_USERS.discard(uid))
+    return True
+
+@pyro.on_callback_query(callback_data_filter("add_forums_only"))
+async def add_forums_only_callback(client, callback_query):
+    """Handle add forums only callback"""
+    try:
+        uid = callback_query.from_user.id
+        # The dialog scan can take seconds; run it in the background so the button never hangs
+        if not start_bulk_group_action(
+            client, uid, bulk_select_forums_only,
+            "<b> Added {count} Forum Groups</b>\n\n"
+            "Based on your Telegram groups as of the last minute.",
+            "Error adding forums. Try again.",
+            forums_only=True
+        ):
+            await callback_query.answer("⏳ Your previous bulk action is still running.", show_alert=True)
+            return
+        await callback_query.answer("Fetching groups and adding forums...")
+        
     except Exception as e:
         logger.error(f"Error in add_forums_only callback: {e}")
         await callback_query.answer("Error adding forums. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^add_all_groups_bulk$"))
+@pyro.on_callback_query(callback_data_filter("add_all_groups_bulk"))
 async def add_all_groups_bulk_callback(client, callback_query):
     """Handle add all groups (bulk) callback"""
     try:
         uid = callback_query.from_user.id
-        await callback_query.answer("Fetching groups and adding all...")
-        
-        user = db.db.users.find_one({"user_id": uid})
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
-        
-        # Fetch fresh groups from user's accounts
-        accounts = db.get_user_accounts(uid)
-        if not accounts:
-            await callback_query.message.reply_text(
-                " No accounts found. Please add an account first.",
-                parse_mode=ParseMode.HTML
-            )
-            return
-        
-        # Get groups from first account (fresh fetch)
-        all_groups = []
-        for acc in accounts:
-            try:
-                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                async for dialog in tg_client.iter_dialogs():
-                    if dialog.is_group or dialog.is_channel:
-                        entity = dialog.entity
-                        group_data = {
-                            "id": entity.id,
-                            "title": dialog.title,
-                            "is_forum": getattr(entity, 'forum', False)
-                        }
-                        all_groups.append(group_data)
-                break  # Use first account only
-            except Exception as e:
-                logger.error(f"Error fetching groups from account: {e}")
-                continue
-        
-        if not all_groups:
-            await callback_query.message.reply_text(
-                " No groups found in your accounts.",
-                parse_mode=ParseMode.HTML
-            )
+        if not start_bulk_group_action(
+            client, uid, bulk_select_all_groups,
+            "<b> Added {count} Groups</b>{filter_text}\n\n"
+            "Based on your Telegram groups as of the last minute.",
+            "Error adding groups. Try again."
+        ):
+            await callback_query.answer("⏳ Your previous bulk action is still running.", show_alert=True)
             return
-        
-        # Apply search filter if exists
-        search_filter = db.get_group_search_filter(uid)
-        filtered_groups = filter_groups_by_keyword(all_groups, search_filter)
-        
-        # Bulk add all groups
-        added_count = bulk_select_all_groups(uid, filtered_groups, forum_only_mode)
-        
-        filter_text = f" (filtered by '{search_filter}')" if search_filter else ""
-        await callback_query.message.reply_text(
-            f"<b> Added {added_count} Groups</b>{filter_text}\n\n"
-            f"Fetched fresh from your Telegram account.",
-            parse_mode=ParseMode.HTML
-        )
+        await callback_query.answer("Fetching groups and adding all...")
         
     except Exception as e:
         logger.error(f"Error in add_all_groups_bulk callback: {e}")
         await callback_query.answer("Error adding groups. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^unselect_all_filtered$"))
+@pyro.on_callback_query(callback_data_filter("unselect_all_filtered"))
 async def unselect_all_filtered_callback(client, callback_query):
     """Handle unselect all filtered groups callback"""
     try:
         uid = callback_query.from_user.id
-        await callback_query.answer("Fetching groups and removing filtered...")
-        
-        user = db.db.users.find_one({"user_id": uid})
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
-        
-        # Fetch fresh groups from user's accounts
-        accounts = db.get_user_accounts(uid)
-        if not accounts:
-            await callback_query.message.reply_text(
-                " No accounts found. Please add an account first.",
-                parse_mode=ParseMode.HTML
-            )
-            return
-        
-        # Get groups from first account (fresh fetch)
-        all_groups = []
-        for acc in accounts:
-            try:
-                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                async for dialog in tg_client.iter_dialogs():
-                    if dialog.is_group or dialog.is_channel:
-                        entity = dialog.entity
-                        group_data = {
-                            "id": entity.id,
-                            "title": dialog.title,
-                            "is_forum": getattr(entity, 'forum', False)
-                        }
-                        all_groups.append(group_data)
-                break  # Use first account only
-            except Exception as e:
-                logger.error(f"Error fetching groups from account: {e}")
-                continue
-        
-        if not all_groups:
-            await callback_query.message.reply_text(
-                " No groups found in your accounts.",
-                parse_mode=ParseMode.HTML
-            )
+        if not start_bulk_group_action(
+            client, uid, bulk_unselect_all,
+            "<b> Removed {count} Groups</b>{filter_text}\n\n"
+            "Based on your Telegram groups as of the last minute.",
+            "Error removing groups. Try again."
+        ):
+            await callback_query.answer("⏳ Your previous bulk action is still running.", show_alert=True)
             return
-        
-        # Apply search filter if exists
-        search_filter = db.get_group_search_filter(uid)
-        filtered_groups = filter_groups_by_keyword(all_groups, search_filter)
-        
-        # Bulk unselect filtered groups
-        removed_count = bulk_unselect_all(uid, filtered_groups, forum_only_mode)
-        
-        filter_text = f" (filtered by '{search_filter}')" if search_filter else ""
-        await callback_query.message.reply_text(
-            f"<b> Removed {removed_count} Groups</b>{filter_text}\n\n"
-            f"Fetched fresh from your Telegram account.",
-            parse_mode=ParseMode.HTML
-        )
+        await callback_query.answer("Fetching groups and removing filtered...")
         
     except Exception as e:
         logger.error(f"Error in unselect_all_filtered callback: {e}")
         await callback_query.answer("Error removing groups. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^unselect_all_groups$"))
+@pyro.on_callback_query(callback_data_filter("unselect_all_groups"))
 async def unselect_all_groups_callback(client, callback_query):
     """Handle unselect all groups callback"""
     try:
         uid = callback_query.from_user.id
         
-        user = db.db.users.find_one({"user_id": uid})
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
-        
-        if forum_only_mode:
-            selected_groups = db.get_forum_groups(uid) or []
+        # Every selection of the mode goes, so no need to read them back first
+        if get_forum_only_mode(uid):
+            db.clear_forum_groups(uid)
         else:
-            selected_groups = db.get_target_groups(uid) or []
-        
-        for group in selected_groups:
-            if forum_only_mode:
-                db.remove_forum_group(uid, group['group_id'])
-            else:
-                db.remove_target_group(uid, group['group_id'])
+            db.clear_target_groups(uid)
         
         await callback_query.answer("All groups unselected ", show_alert=True)
 
-        callback_query.data = "groups_menu"
-        await groups_menu_callback(client, callback_query)
+        await show_groups_menu(callback_query)
 
     except Exception as e:
         logger.error(f"Error in unselect all groups callback: {e}")
@@ -4761,6 +4983,22 @@ async def unselect_all_groups_callback(client, callback_query):
 # =======================================================
 #  🔐 JOIN VERIFICATION FUNCTIONS
 # =======================================================
+def join_check_missing(channel_joined, group_joined):
+    """Alert text and log summary for the chats a user still has to join"""
+    missing = [name for name, joined in (("📢 Channel", channel_joined), (" Group", group_joined)) if not joined]
+    missing_lines = "\n".join(missing)
+    return (
+        f" You haven't joined:\n\n{missing_lines}\n\nPlease join and try again!",
+        ", ".join(missing)
+    )
+
+# (channel_joined, group_joined) -> (alert text, log summary); only four combinations exist
+JOIN_CHECK_MISSING = {
+    (channel_joined, group_joined): join_check_missing(channel_joined, group_joined)
+    for channel_joined in (True, False)
+    for group_joined in (True, False)
+}
+
 @pyro.on_callback_query(filters.regex("joined_check"))
 async def joined_check_callback(client, callback_query):
     """Handle joined check callback with instant Telethon verification using bot as admin"""
@@ -4775,26 +5013,18 @@ async def joined_check_callback(client, callback_query):
             await telethon_bot.connect()
             await telethon_bot.start(bot_token=config.BOT_TOKEN)
         
-        is_joined = await verify_all_joins(
+        # Both memberships are checked concurrently; a failure reports from the same results
+        channel_joined, group_joined = await check_all_joins(
             telethon_bot,
             uid,
             config.MUST_JOIN_CHANNEL,
             config.MUSTJOIN_GROUP
         )
         
-        if not is_joined:
-            missing = []
-            channel_check = await instant_join_check(telethon_bot, uid, config.MUST_JOIN_CHANNEL)
-            group_check = await instant_join_check(telethon_bot, uid, config.MUSTJOIN_GROUP)
-            
-            if not channel_check:
-                missing.append("📢 Channel")
-            if not group_check:
-                missing.append(" Group")
-                
-            msg = f" You haven't joined:\n\n{chr(10).join(missing)}\n\nPlease join and try again!"
+        if not (channel_joined and group_joined):
+            msg, missing = JOIN_CHECK_MISSING[(bool(channel_joined), bool(group_joined))]
             await callback_query.answer(msg, show_alert=True)
-            logger.info(f" User {uid} failed join check: missing {', '.join(missing)}")
+            logger.info(f" User {uid} failed join check: missing {missing}")
             return
         
         logger.info(f" User {uid} passed instant join verification!")
@@ -4802,7 +5032,6 @@ async def joined_check_callback(client, callback_query):
         
         await callback_query.message.delete()
         
-        from types import SimpleNamespace
         mock_message = SimpleNamespace(
             chat=callback_query.message.chat,
             from_user=callback_query.from_user,
@@ -4825,7 +5054,126 @@ async def back_to_start_callback(client, callback_query):
     except Exception as e:
         logger.error(f"Error in back to start callback: {e}")
 
-@pyro.on_callback_query(filters.regex("^menu_main$|^menu_broadcast$|^menu_login$|^menu_groups$|^menu_settings$"))
+def build_menu_status(uid, accounts):
+    """Build the status block shared by the main menu and its submenus.
+    Returns (status_info, is_running)."""
+    accounts_count = len(accounts)
+
+    # One round trip for every setting shown below
+    settings = db.get_user_bundle(uid, (
+        "running", "ad_delay", "group_msg_delay", "cycle_timeout", "accounts_limit",
+        "broadcast_mode", "message_source", "group_counts", "group_counts_at"
+    ))
+
+    is_running = settings["running"]
+    broadcast_status = "Running " if is_running else "Stopped "
+
+    current_delay = settings["ad_delay"] or 600
+    group_msg_delay = settings["group_msg_delay"]
+    cycle_timeout = settings["cycle_timeout"]
+
+    account_limit = settings["accounts_limit"]
+
+    # Get broadcast mode and message source
+    broadcast_mode = settings["broadcast_mode"]
+
+    # Get message source (post link or saved messages)
+    if settings["message_source"] == "post_link":
+        message_source = " Post Link"
+    else:
+        message_source = " Saved Messages"
+
+    # Groups, forums and topics counts; recounting takes a full dialog scan, so a missing
+    # or stale count is refreshed in the background and shown on the next render
+    group_counts = settings["group_counts"] if accounts else None
+    if accounts and (
+        not group_counts
+        or settings["group_counts_at"] < datetime.utcnow() - timedelta(seconds=MENU_GROUP_COUNTS_TTL)
+    ):
+        spawn_background_task(refresh_menu_group_counts(uid, accounts))
+    total_groups_count, groups_only_count, forums_only_count, topics_count = group_counts or (0, 0, 0, 0)
+
+    status_info = (
+        f"\n★ ACCOUNTS STATUS\n"
+        f"  → Active Accounts: {accounts_count}/{account_limit}\n\n"
+        f"★ BROADCAST STATUS\n"
+        f"  → Message Mode: {message_source}\n"
+        f"  → Broadcast State: {broadcast_status}\n"
+        f"  → Cycle Interval: {current_delay}s\n"
+        f"  → Cycle Timeout: {cycle_timeout//60}min\n"
+        f"  → Message Delay: {group_msg_delay}s\n\n"
+        f"★ GROUPS SETTINGS\n"
+        f"  → Broadcast Mode: {BROADCAST_MODE_DISPLAY.get(broadcast_mode, 'Both')}\n"
+        f"  → Total Groups: {total_groups_count}\n"
+        f"  → Groups Only: {groups_only_count}\n"
+        f"  → Forums Only: {forums_only_count}\n"
+        f"  → Topics: {topics_count}"
+    )
+
+    return status_info, is_running
+
+NO_ACCOUNTS_STATUS = (
+    "\n★ ACCOUNTS STATUS\n"
+    "  → No account hosted yet\n\n"
+    "<i>Open Manage Account to host one and start broadcasting.</i>"
+)
+
+BROADCAST_MODE_DISPLAY = {
+    "groups_only": " Groups Only",
+    "forums_only": " Topics Only",
+    "both": " Both Groups & Topics"
+}
+
+# Menu keyboards are the same for every user; only the broadcast toggle and the
+# dashboard link vary, so the rows are built once
+MAIN_MENU_ROWS = [
+    [InlineKeyboardButton("⇒  Broadcast Menu", callback_data="menu_broadcast")],
+    [InlineKeyboardButton("⇒  Manage Account", callback_data="menu_manage_account")],
+    [InlineKeyboardButton("⇒  Groups Settings", callback_data="menu_groups")],
+    [InlineKeyboardButton("⇒  Post Link Management", callback_data="menu_post_link")],
+    [InlineKeyboardButton("⇒  Saved Message Management", callback_data="menu_saved_messages")],
+    [InlineKeyboardButton("⏱ Interval Management", callback_data="menu_interval_management")],
+]
+
+def broadcast_menu_rows(is_running):
+    """Broadcast menu rows with the start or stop button"""
+    return [
+        [
+            InlineKeyboardButton("👥 Groups Mode", callback_data="menu_groups_mode"),
+            InlineKeyboardButton("🔁 Ads Forward Mode", callback_data="menu_ads_forward_mode"),
+        ],
+        [
+            InlineKeyboardButton(
+                "Start Broadcast 🚀" if not is_running else "Stop Broadcast 🛑",
+                callback_data="start_broadcast" if not is_running else "stop_broadcast",
+            )
+        ],
+        [
+            InlineKeyboardButton("📊 View Analytics", callback_data="view_analytics"),
+            InlineKeyboardButton("🕛 Scheduled Ads ", callback_data="scheduled_ads")
+        ],
+        [InlineKeyboardButton("←", callback_data="menu_main")],
+    ]
+
+BROADCAST_MENU_RUNNING = broadcast_menu_rows(True)
+BROADCAST_MENU_STOPPED = broadcast_menu_rows(False)
+
+LOGIN_MENU = [
+    [
+        InlineKeyboardButton("+ Add Account", callback_data="host_account"),
+    ],
+    [InlineKeyboardButton("←", callback_data="menu_main")],
+]
+
+GROUPS_MENU = [
+    [InlineKeyboardButton("○ Groups Only Mode", callback_data="groups_only_mode")],
+    [InlineKeyboardButton("◆ Topics Only Mode", callback_data="forums_only_mode")],
+    [InlineKeyboardButton("● Both Groups & Topics", callback_data="both_groups_topics_mode")],
+    [InlineKeyboardButton("↻ Refresh Groups Cache", callback_data="refresh_groups_cache")],
+    [InlineKeyboardButton("←", callback_data="menu_main")],
+]
+
+@pyro.on_callback_query(callback_data_filter("menu_main", "menu_broadcast", "menu_login", "menu_groups", "menu_settings"))
 async def menu_callback(client, callback_query):
     """Handle all menu callbacks (cleaned, safe, and optimized)"""
     try:
@@ -4839,188 +5187,37 @@ async def menu_callback(client, callback_query):
             except Exception:
                 pass
 
-        accounts = db.get_user_accounts(uid) or []
-        accounts_count = len(accounts)
-
-        ad_msg_status = "Auto (From Saved Messages) "
-
-        broadcast_state = db.get_broadcast_state(uid) or {}
-        is_running = broadcast_state.get("running", False)
-        broadcast_status = "Running " if is_running else "Stopped "
+        # Only the fields needed to connect, for the background group recount
+        accounts = db.get_user_accounts(uid, fields=("phone_number", "session_string")) or []
 
-        current_delay = db.get_user_ad_delay(uid) or 600
-        group_msg_delay = (
-            db.get_user_group_msg_delay(uid)
-            if hasattr(db, 'get_user_group_msg_delay')
-            else 30
-        )
-        cycle_timeout = (
-            db.get_user_cycle_timeout(uid)
-            if hasattr(db, 'get_user_cycle_timeout')
-            else 900
-        )
-
-        user = db.get_user(uid)
-        account_limit = user.get('accounts_limit', 1) if user else 1
-        forum_only_mode = user.get("forum_only_mode", False) if user else False
-        groups_label = "Forum Groups" if forum_only_mode else "Target Groups"
-        
-        if forum_only_mode:
-            target_groups_count = len(db.get_forum_groups(uid) or [])
-        else:
-            target_groups_count = len(db.get_target_groups(uid) or [])
-        
-        # Get broadcast mode and message source
-        broadcast_mode = db.get_broadcast_mode(uid)
-        broadcast_mode_display = {
-            "groups_only": " Groups Only",
-            "forums_only": " Topics Only",
-            "both": " Both Groups & Topics"
-        }
-        
-        # Get message source (post link or saved messages)
-        post_link_data = db.get_user_post_link(uid)
-        if post_link_data and post_link_data.get("message_source") == "post_link":
-            message_source = " Post Link"
+        # Account-less users get a fixed main menu caption; submenus still render the full status
+        if not accounts and menu_type == "menu_main":
+            status_info, is_running = NO_ACCOUNTS_STATUS, False
         else:
-            message_source = " Saved Messages"
-        
-        # Calculate groups, forums, and topics count
-        total_groups_count = 0
-        groups_only_count = 0
-        forums_only_count = 0
-        topics_count = 0
-        
-        accounts = db.get_user_accounts(uid)
-        if accounts:
-            for acc in accounts:
-                try:
-                    tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                    async for dialog in tg_client.iter_dialogs():
-                        if dialog.is_group or dialog.is_channel:
-                            entity = dialog.entity
-                            is_forum = getattr(entity, 'forum', False)
-                            total_groups_count += 1
-                            
-                            if is_forum:
-                                forums_only_count += 1
-                                # Count topics in this forum
-                                try:
-                                    result = await tg_client(GetForumTopicsRequest(
-                                        channel=entity,
-                                        offset_date=0,
-                                        offset_id=0,
-                                        offset_topic=0,
-                                        limit=100
-                                    ))
-                                    topics_count += len(result.topics)
-                                except:
-                                    pass
-                            else:
-                                groups_only_count += 1
-                    
-                    await tg_client.disconnect()
-                    break
-                except Exception as e:
-                    logger.error(f"Error counting groups: {e}")
-        
-        status_info = (
-            f"\n★ ACCOUNTS STATUS\n"
-            f"  → Active Accounts: {accounts_count}/{account_limit}\n\n"
-            f"★ BROADCAST STATUS\n"
-            f"  → Message Mode: {message_source}\n"
-            f"  → Broadcast State: {broadcast_status}\n"
-            f"  → Cycle Interval: {current_delay}s\n"
-            f"  → Cycle Timeout: {cycle_timeout//60}min\n"
-            f"  → Message Delay: {group_msg_delay}s\n\n"
-            f"★ GROUPS SETTINGS\n"
-            f"  → Broadcast Mode: {broadcast_mode_display.get(broadcast_mode, 'Both')}\n"
-            f"  → Total Groups: {total_groups_count}\n"
-            f"  → Groups Only: {groups_only_count}\n"
-            f"  → Forums Only: {forums_only_count}\n"
-            f"  → Topics: {topics_count}"
-        )
+            status_info, is_running = build_menu_status(uid, accounts)
 
-        if accounts_count == 0:
-            account_button_text = " Host Account"
-            account_button_callback = "host_account"
-        else:
-            account_button_text = " Logout Account"
-            account_button_callback = "instant_logout"
-        
-        # Check if account is added
-        accounts = db.get_user_accounts(uid)
-        if accounts:
-            account_button_text = "⇒  Manage Account"
-        else:
-            account_button_text = "⇒  Manage Account"
-        
         # Check if Dashboard URL is available for Web Dashboard button
-        from pyrogram.types import WebAppInfo
         dashboard_url = getattr(config, 'DASHBOARD_URL', '')
         
-        main_menu = [
-            [InlineKeyboardButton("⇒  Broadcast Menu", callback_data="menu_broadcast")],
-            [InlineKeyboardButton(account_button_text, callback_data="menu_manage_account")],
-            [InlineKeyboardButton("⇒  Groups Settings", callback_data="menu_groups")],
-            [InlineKeyboardButton("⇒  Post Link Management", callback_data="menu_post_link")],
-            [InlineKeyboardButton("⇒  Saved Message Management", callback_data="menu_saved_messages")],
-            [InlineKeyboardButton("⏱ Interval Management", callback_data="menu_interval_management")],
-        ]
+        main_menu = MAIN_MENU_ROWS
         
         # Add Web Dashboard button right after interval management
         if dashboard_url and dashboard_url.startswith('http'):
             full_url = f"{dashboard_url}?user_id={uid}"
-            main_menu.append([InlineKeyboardButton("📊 Web Dashboard", web_app=WebAppInfo(url=full_url))])
+            main_menu = MAIN_MENU_ROWS + [[InlineKeyboardButton("📊 Web Dashboard", web_app=WebAppInfo(url=full_url))]]
             logger.info(f"Dashboard button added with URL: {full_url}")
         else:
             logger.warning("Dashboard button not added - DASHBOARD_URL not set or invalid")
 
-        schedule_enabled = db.db.users.find_one({"user_id": uid}, {"schedule_enabled": 1})
-        schedule_enabled = schedule_enabled.get("schedule_enabled", False) if schedule_enabled else False
-        
-        broadcast_menu = [
-            [
-                InlineKeyboardButton("👥 Groups Mode", callback_data="menu_groups_mode"),
-                InlineKeyboardButton("🔁 Ads Forward Mode", callback_data="menu_ads_forward_mode"),
-            ],
-            [
-                InlineKeyboardButton(
-                    "Start Broadcast 🚀" if not is_running else "Stop Broadcast 🛑",
-                    callback_data="start_broadcast" if not is_running else "stop_broadcast",
-                )
-            ],
-            [
-                InlineKeyboardButton("📊 View Analytics", callback_data="view_analytics"),
-                InlineKeyboardButton(f"🕛 Scheduled Ads {'' if schedule_enabled else ''}", callback_data="scheduled_ads")
-            ],
-            [InlineKeyboardButton("←", callback_data="menu_main")],
-        ]
-
-        login_menu = [
-            [
-                InlineKeyboardButton("+ Add Account", callback_data="host_account"),
-            ],
-            [InlineKeyboardButton("←", callback_data="menu_main")],
-        ]
-
-        groups_menu = [
-            [InlineKeyboardButton("○ Groups Only Mode", callback_data="groups_only_mode")],
-            [InlineKeyboardButton("◆ Topics Only Mode", callback_data="forums_only_mode")],
-            [InlineKeyboardButton("● Both Groups & Topics", callback_data="both_groups_topics_mode")],
-            [InlineKeyboardButton("↻ Refresh Groups Cache", callback_data="refresh_groups_cache")],
-            [InlineKeyboardButton("←", callback_data="menu_main")],
-        ]
-
         if menu_type == "menu_broadcast":
             caption = f"<b>BROADCAST MENU</b>\n{status_info}"
-            buttons = broadcast_menu
+            buttons = BROADCAST_MENU_RUNNING if is_running else BROADCAST_MENU_STOPPED
         elif menu_type == "menu_login":
             caption = f"<b>ACCOUNT MENU</b>\n\n{status_info}"
-            buttons = login_menu
+            buttons = LOGIN_MENU
         elif menu_type == "menu_groups":
             caption = f"<b>GROUPS MENU</b>\n\n{status_info}"
-            buttons = groups_menu
+            buttons = GROUPS_MENU
         else:
             caption = ( 
                 f"{status_info}\n\n"
@@ -5064,7 +5261,7 @@ async def menu_callback(client, callback_query):
         logger.error(f"Error in menu callback: {e}")
         await callback_query.answer("Error loading menu. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^set_ad_delay$"))
+@pyro.on_callback_query(callback_data_filter("set_ad_delay"))
 async def set_ad_delay_callback(client, callback_query):
     """Show preset delay options for broadcast interval"""
     try:
@@ -5118,7 +5315,7 @@ async def host_account_callback(client, callback_query):
     """Handle host account callback - FREE FOR ALL - Smart API credentials management"""
     try:
         uid = callback_query.from_user.id
-        user = db.get_user(uid)
+        user = db.get_user(uid, ("accounts_limit",))
         
         if not user:
             await callback_query.answer("Please restart with /start", show_alert=True)
@@ -5218,7 +5415,7 @@ async def temp_api_start_callback(client, callback_query):
         logger.error(f"Error in temp_api_start: {e}")
         await callback_query.answer("Error starting API setup.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex(r"^instant_logout$"))
+@pyro.on_callback_query(callback_data_filter("instant_logout"))
 async def instant_logout_callback(client, callback_query):
     """Show confirmation before logging out (delete all accounts)."""
     try:
@@ -5249,7 +5446,7 @@ async def instant_logout_callback(client, callback_query):
         logger.error(f"Error showing logout confirmation for {uid}: {e}")
         await callback_query.answer(" Failed to open confirmation. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex(r"^confirm_instant_logout_yes$"))
+@pyro.on_callback_query(callback_data_filter("confirm_instant_logout_yes"))
 async def confirm_instant_logout_callback(client, callback_query):
     """Perform the full logout after user confirmation."""
     try:
@@ -5258,24 +5455,25 @@ async def confirm_instant_logout_callback(client, callback_query):
 
         await callback_query.answer(" Logging out...", show_alert=False)
 
-        accounts = db.get_user_accounts(uid)
-
-        if not accounts:
+        phone_numbers = [acc["phone_number"] for acc in db.get_user_accounts(uid, fields=("phone_number",))]
+        if not phone_numbers:
             await callback_query.answer("No accounts to logout!", show_alert=True)
             return
 
         deleted_count = 0
-        for account in accounts:
-            try:
-                acc_id = str(account.get('_id'))
-                if db.delete_user_account(uid, acc_id):
-                    deleted_count += 1
-                    logger.info(f"Deleted account {account.get('phone_number')} for user {uid}")
-            except Exception as ex_del:
-                logger.error(f"Error deleting account {acc_id} for user {uid}: {ex_del}")
+        try:
+            deleted_count = db.delete_all_user_accounts(uid)
+        except Exception as ex_del:
+            logger.error(f"Error deleting accounts for user {uid}: {ex_del}")
+        
+        # Drop the live clients and decrypted sessions of the removed accounts
+        await release_telegram_clients(phone_numbers)
+        decrypt_session.cache_clear()
 
         try:
             db.delete_user_fully(uid)
+            FORUM_MODE_CACHE.pop(uid, None)
+            invalidate_user_dialog_caches(uid)
             # Delete groups cache when user logs out all accounts
             db.delete_groups_cache(uid)
             logger.info(f" Full cleanup executed for user {uid} - {deleted_count} account(s) removed, cache cleared")
@@ -5323,7 +5521,7 @@ async def confirm_instant_logout_callback(client, callback_query):
         logger.error(f"Error in confirm_instant_logout callback: {e}")
         await callback_query.answer(" Error during logout. Please try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^select_saved_messages_count$"))
+@pyro.on_callback_query(callback_data_filter("select_saved_messages_count"))
 async def select_saved_messages_count_callback(client, callback_query):
     """Ask user how many saved messages to use for rotation"""
     try:
@@ -5426,7 +5624,7 @@ async def quick_delay_callback(client, callback_query):
             caption=f"""<b>✅ CYCLE INTERVAL UPDATED!</b>\n\n"""
                     f"<u>New Interval:</u> <code>{delay} seconds</code>\n\n"
                     f"Ready for broadcasting!",
-            reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]]),
+            reply_markup=BACK_TO_MAIN_MARKUP,
             parse_mode=ParseMode.HTML
         )
         await send_dm_log(uid, f"<b> Broadcast interval updated:</b> {delay} seconds")
@@ -5442,9 +5640,10 @@ async def start_broadcast_callback(client, callback_query):
     """Handle start broadcast callback"""
     try:
         uid = callback_query.from_user.id
+        bundle = db.get_user_bundle(uid, ("post_link", "running", "saved_messages_count", "accounts", "logger_status"))
         
         # Check if using post link mode and verify link is set
-        post_link_data = db.get_user_post_link(uid)
+        post_link_data = bundle["post_link"]
         if post_link_data and post_link_data.get("message_source") == "post_link":
             # User is in post link mode - verify post link exists
             if not post_link_data.get("post_link") or not post_link_data.get("saved_msg_id"):
@@ -5462,83 +5661,77 @@ async def start_broadcast_callback(client, callback_query):
                     parse_mode=ParseMode.HTML
                 )
                 return
-        if db.get_broadcast_state(uid).get("running"):
+        if bundle["running"]:
             await callback_query.answer("Broadcast already running!", show_alert=True)
             return
         
-        user_msg_count = db.get_user_saved_messages_count(uid)
+        user_msg_count = bundle["saved_messages_count"]
         
-        accounts = db.get_user_accounts(uid) or []
+        accounts = bundle["accounts"]
         if accounts:
             try:
                 acc = accounts[0]
-                session_encrypted = acc.get("session_string") or ""
-                session_str = cipher_suite.decrypt(session_encrypted.encode()).decode()
+                tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
                 
-                credentials = db.get_user_api_credentials(acc['user_id'])
-                if credentials:
-                    tg_client = TelegramClient(StringSession(session_str), credentials['api_id'], credentials['api_hash'])
-                    await tg_client.start()
-                    
-                    saved_msgs_list = []
-                    messages = await tg_client.get_messages("me", limit=20)
-                    for msg in messages:
-                        if msg.text or msg.media:
-                            saved_msgs_list.append(msg)
+                saved_count = 0
+                async for msg in tg_client.iter_messages("me", limit=20):
+                    if msg.text or msg.media:
+                        saved_count += 1
+                        if saved_count >= user_msg_count:
+                            break
                     
-                    await tg_client.disconnect()
-                    
-                    if len(saved_msgs_list) < user_msg_count:
-                        await callback_query.answer()
-                        await callback_query.message.edit_media(
-                            InputMediaPhoto(
-                                media=config.START_IMAGE,
-                                caption=f"""<b> NOT ENOUGH SAVED MESSAGES!</b>
+                if saved_count < user_msg_count:
+                    await callback_query.answer()
+                    await callback_query.message.edit_media(
+                        InputMediaPhoto(
+                            media=config.START_IMAGE,
+                            caption=f"""<b> NOT ENOUGH SAVED MESSAGES!</b>
 
 <b>Selected Message Count:</b> <code>{user_msg_count}</code> messages
-<b>Available in Saved Messages:</b> <code>{len(saved_msgs_list)}</code> messages
+<b>Available in Saved Messages:</b> <code>{saved_count}</code> messages
 
 <b> Problem:</b>
-You've selected to use {user_msg_count} messages for rotation, but you only have {len(saved_msgs_list)} message{'s' if len(saved_msgs_list) != 1 else ''} in your Telegram Saved Messages.
+You've selected to use {user_msg_count} messages for rotation, but you only have {saved_count} message{'s' if saved_count != 1 else ''} in your Telegram Saved Messages.
 
 <b> Solution (choose one):</b>
 
 <b>Option 1:</b> Add more messages to your Saved Messages
 • Open Telegram "Saved Messages" chat
-• Save at least {user_msg_count - len(saved_msgs_list)} more message{'s' if (user_msg_count - len(saved_msgs_list)) > 1 else ''}
+• Save at least {user_msg_count - saved_count} more message{'s' if (user_msg_count - saved_count) > 1 else ''}
 • Return and start broadcast
 
 <b>Option 2:</b> Reduce your message count setting
 • Click "Select Saved Messages "
-• Enter {len(saved_msgs_list)} or less
+• Enter {saved_count} or less
 • Start broadcast
 
 <i>Make sure you have enough messages before broadcasting!</i>""",
-                                parse_mode=ParseMode.HTML
-                            ),
-                            reply_markup=InlineKeyboardMarkup([
-                                [InlineKeyboardButton("★ Select Saved Messages", callback_data="select_saved_messages_count")],
-                                [InlineKeyboardButton("x Back", callback_data="menu_broadcast")]
-                            ])
-                        )
-                        return
-            except Exception as e:
+                            parse_mode=ParseMode.HTML
+                        ),
+                        reply_markup=InlineKeyboardMarkup([
+                            [InlineKeyboardButton("★ Select Saved Messages", callback_data="select_saved_messages_count")],
+                            [InlineKeyboardButton("x Back", callback_data="menu_broadcast")]
+                        ])
+                    )
+                    return
+            except (ConnectionError, asyncio.TimeoutError, RPCError) as e:
                 logger.warning(f"Could not verify saved messages count for user {uid}: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error verifying saved messages for user {uid}: {e}")
         
-        accounts = db.get_user_accounts(uid)
         if not accounts:
             await callback_query.answer("No accounts hosted yet!", show_alert=True)
             return
         
-        if not db.get_logger_status(uid):
+        if not bundle["logger_status"]:
             try:
                 await callback_query.message.edit_caption(
                     caption="<b> Logger bot not started yet!</b>\n\n"
-                            f"Please start @{config.LOGGER_BOT_USERNAME.lstrip('@')} to receive Advertising logs.\n"
+                            f"Please start @{LOGGER_BOT_USERNAME} to receive Advertising logs.\n"
                             "<i>After starting, return here to begin Advertising.</i>",
                     parse_mode=ParseMode.HTML,
                     reply_markup=kb([
-                        [InlineKeyboardButton("+ Start Logger Bot", url=f"https://t.me/{config.LOGGER_BOT_USERNAME.lstrip('@')}")],
+                        [InlineKeyboardButton("+ Start Logger Bot", url=LOGGER_BOT_URL)],
                         [InlineKeyboardButton("←", callback_data="menu_main")]
                     ])
                 )
@@ -5547,29 +5740,31 @@ You've selected to use {user_msg_count} messages for rotation, but you only have
                 await callback_query.answer("Error: Please try again.", show_alert=True)
             return
         
-        current_task = user_tasks.get(uid)
-        if current_task:
-            try:
-                current_task.cancel()
-                await current_task
-                logger.info(f"Cancelled previous broadcast for {uid}")
-            except Exception as e:
-                logger.error(f"Failed to cancel previous broadcast task for {uid}: {e}")
-            finally:
-                if uid in user_tasks:
-                    del user_tasks[uid]
-        
-        task = asyncio.create_task(run_broadcast(client, uid))
-        user_tasks[uid] = task
-        db.set_broadcast_state(uid, running=True)
+        if uid in BROADCAST_STARTING:
+            await callback_query.answer("Broadcast is already starting!", show_alert=True)
+            return
+        BROADCAST_STARTING.add(uid)
+        try:
+            # Another tap may have started the broadcast while this one was checking Saved Messages
+            if db.get_broadcast_state(uid).get("running"):
+                await callback_query.answer("Broadcast already running!", show_alert=True)
+                return
+            
+            await cancel_broadcast_task(uid)
+            
+            track_broadcast_task(uid, asyncio.create_task(run_broadcast(client, uid)))
+            db.set_broadcast_state(uid, running=True)
+        finally:
+            BROADCAST_STARTING.discard(uid)
+        ANALYTICS_TEXT_CACHE.pop(uid, None)
         
         try:
             await callback_query.message.edit_caption(
                 caption=""" <b>BROADCAST ON! </b>\n\n"""
                         """Your ads are now being sent to the groups your account is joined in.\n"""
-                        f"""Logs will be sent to your DM via @{config.LOGGER_BOT_USERNAME.lstrip('@')}.</i>""",
+                        f"""Logs will be sent to your DM via @{LOGGER_BOT_USERNAME}.</i>""",
                 parse_mode=ParseMode.HTML,
-                reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                reply_markup=BACK_TO_MAIN_MARKUP
             )
             await callback_query.answer("Broadcast started! ", show_alert=True)
             logger.info(f"Broadcast started via callback for user {uid}")
@@ -5581,9 +5776,9 @@ You've selected to use {user_msg_count} messages for rotation, but you only have
                     photo=config.START_IMAGE,
                     caption="""<b>BROADCAST ON! </b>\n\n"""
                             """Your ads are now being sent to the groups your account is joined in.\n"""
-                            f"""Logs will be sent to your DM via @{config.LOGGER_BOT_USERNAME.lstrip('@')}.""",
+                            f"""Logs will be sent to your DM via @{LOGGER_BOT_USERNAME}.""",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 await callback_query.answer("Broadcast started! ", show_alert=True)
                 await send_dm_log(uid, "<b>Broadcast started! Logs will come here</b>")
@@ -5614,7 +5809,7 @@ async def stop_broadcast_callback(client, callback_query):
                 caption="""<b>BROADCAST STOPPED! </b>\n\n"""
                         """Your broadcast has been stopped.\n"""
                         """Check analytics for final stats.""",
-                reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]]),
+                reply_markup=BACK_TO_MAIN_MARKUP,
                 parse_mode=ParseMode.HTML
             )
         except Exception as e:
@@ -5626,7 +5821,7 @@ async def stop_broadcast_callback(client, callback_query):
                         """Your broadcast has been stopped.\n"""
                         """Check analytics for final stats.""",
                 parse_mode=ParseMode.HTML,
-                reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                reply_markup=BACK_TO_MAIN_MARKUP
             )
         await send_dm_log(uid, f"<b>Broadcast stopped!</b>")
         logger.info(f"Broadcast stopped via callback for user {uid}")
@@ -5635,6 +5830,66 @@ async def stop_broadcast_callback(client, callback_query):
         logger.error(f"Error in stop_broadcast callback: {e}")
         await callback_query.answer("Error stopping broadcast. Try again.", show_alert=True)
 
+# uid -> (analytics_text, expires_at); absorbs repeated "Refresh Analytics" presses
+ANALYTICS_TEXT_CACHE = {}
+ANALYTICS_TEXT_TTL = 10
+
+ANALYTICS_TEMPLATE = (
+    "<b> AZTECH ADS BOT ANALYTICS</b>\n\n"
+    "<b>📈 Broadcast Statistics:</b>\n"
+    "• Cycles Completed: <code>{cycles}</code> \n"
+    "• Messages Sent: <code>{total_sent:,}</code> \n"
+    "• Failed Sends: <code>{total_failed:,}</code> \n"
+    "• Success Rate: <code>{success_rate:.1f}%</code> \n\n"
+    "<b>👤 Account Status:</b>\n"
+    "• Active Accounts: <code>{active_accounts}/{account_limit}</code> \n"
+    "• Logger Failures: <code>{logger_failures}</code> \n\n"
+    "<b> Settings:</b>\n"
+    "• Cycle Interval: <code>{ad_delay}s</code> \n\n"
+    "<i>Keep tracking your broadcast performance! </i>"
+)
+ANALYTICS_MARKUP = kb([
+    [InlineKeyboardButton("↻ Refresh Analytics", callback_data="view_analytics")],
+    [InlineKeyboardButton("←", callback_data="menu_broadcast")]
+])
+
+def get_analytics_text(uid):
+    """Render the analytics screen for a user (cached for ANALYTICS_TEXT_TTL seconds)"""
+    cached = ANALYTICS_TEXT_CACHE.get(uid)
+    if cached:
+        if cached[1] > time.monotonic():
+            return cached[0]
+        ANALYTICS_TEXT_CACHE.pop(uid, None)
+    
+    bundle = db.get_user_bundle(uid, ("analytics", "active_accounts", "logger_failures", "accounts_limit", "ad_delay"))
+    user_stats = bundle["analytics"]
+    logger_failures = bundle["logger_failures"]
+    
+    total_sent = user_stats.get('total_sent', 0)
+    total_failed = user_stats.get('total_failed', 0)
+    total_messages = total_sent + total_failed
+    success_rate = (total_sent / total_messages * 100) if total_messages > 0 else 0
+    
+    account_limit = bundle["accounts_limit"]
+    active_accounts = bundle["active_accounts"]
+    
+    analytics_text = ANALYTICS_TEMPLATE.format_map({
+        "cycles": user_stats.get('total_cycles', 0),
+        "total_sent": total_sent,
+        "total_failed": total_failed,
+        "success_rate": success_rate,
+        "active_accounts": active_accounts,
+        "account_limit": account_limit,
+        "logger_failures": logger_failures,
+        "ad_delay": bundle['ad_delay']
+    })
+    now = time.monotonic()
+    # The TTL is short, so sweeping on every store keeps only users seen in the last few seconds
+    for stale_uid in [key for key, (_, expires_at) in ANALYTICS_TEXT_CACHE.items() if expires_at <= now]:
+        del ANALYTICS_TEXT_CACHE[stale_uid]
+    ANALYTICS_TEXT_CACHE[uid] = (analytics_text, now + ANALYTICS_TEXT_TTL)
+    return analytics_text
+
 @pyro.on_callback_query(filters.regex("view_analytics"))
 async def analytics_callback(client, callback_query):
     """Handle view analytics callback with detailed stats"""
@@ -5642,65 +5897,47 @@ async def analytics_callback(client, callback_query):
         uid = callback_query.from_user.id
         await callback_query.answer()
         
-        user_stats = db.get_user_analytics(uid) if hasattr(db, 'get_user_analytics') else {}
-        if not user_stats:
-            user_stats = db.get_user_stats(uid) if hasattr(db, 'get_user_stats') else {}
-        if not user_stats:
-            user_stats = {}
-        
-        accounts = db.get_user_accounts(uid) or []
-        
-        try:
-            logger_failures = len(db.get_logger_failures(uid)) if hasattr(db, 'get_logger_failures') else 0
-        except:
-            logger_failures = 0
-        
-        total_sent = user_stats.get('total_sent', 0)
-        total_failed = user_stats.get('total_failed', 0)
-        total_messages = total_sent + total_failed
-        success_rate = (total_sent / total_messages * 100) if total_messages > 0 else 0
-        
-        user = db.get_user(uid)
-        account_limit = user.get('accounts_limit', 1) if user else 1
-        active_accounts = len([a for a in accounts if a.get('is_active', False)])
-        
-        analytics_text = (
-            f"<b> AZTECH ADS BOT ANALYTICS</b>\n\n"
-            f"<b>📈 Broadcast Statistics:</b>\n"
-            f"• Cycles Completed: <code>{user_stats.get('total_cycles', 0)}</code> \n"
-            f"• Messages Sent: <code>{total_sent:,}</code> \n"
-            f"• Failed Sends: <code>{total_failed:,}</code> \n"
-            f"• Success Rate: <code>{success_rate:.1f}%</code> \n\n"
-            f"<b>👤 Account Status:</b>\n"
-            f"• Active Accounts: <code>{active_accounts}/{account_limit}</code> \n"
-            f"• Logger Failures: <code>{logger_failures}</code> \n\n"
-            f"<b> Settings:</b>\n"
-            f"• Cycle Interval: <code>{db.get_user_ad_delay(uid)}s</code> \n\n"
-            f"<i>Keep tracking your broadcast performance! </i>"
-        )
+        analytics_text = get_analytics_text(uid)
         
         try:
             await callback_query.message.edit_caption(
                 caption=analytics_text,
-                reply_markup=kb([
-                    [InlineKeyboardButton("↻ Refresh Analytics", callback_data="view_analytics")],
-                    [InlineKeyboardButton("←", callback_data="menu_broadcast")]
-                ]),
+                reply_markup=ANALYTICS_MARKUP,
                 parse_mode=ParseMode.HTML
             )
             logger.info(f"Analytics shown for user {uid}")
-        except Exception as edit_error:
-            error_msg = str(edit_error).lower()
-            if "message is not modified" in error_msg or "same" in error_msg or "not modified" in error_msg:
-                await callback_query.answer(" Analytics already up to date!", show_alert=False)
-                logger.debug(f"Analytics content unchanged for user {uid}")
-            else:
-                raise edit_error
+        except MessageNotModified:
+            await callback_query.answer(" Analytics already up to date!", show_alert=False)
+            logger.debug(f"Analytics content unchanged for user {uid}")
         
     except Exception as e:
         logger.error(f"Error in analytics callback: {e}")
         await callback_query.answer(" Error loading analytics. Try again.", show_alert=True)
 
+DETAILED_REPORT_TEMPLATE = (
+    "<b>DETAILED ANALYTICS REPORT:</b>\n\n"
+    "<u>Date:</u> <i>{date}</i>\n"
+    "<b>User ID:</b> <code>{uid}</code>\n\n"
+    "<b>Broadcast Stats:</b>\n"
+    "- <u>Total Sent:</u> <code>{total_sent}</code>\n"
+    "- <i>Total Failed:</i> <b>{total_failed}</b>\n"
+    "- <u>Total Broadcasts:</u> <code>{total_broadcasts}</code>\n\n"
+    "<b>Logger Stats:</b>\n"
+    "- <u>Logger Failures:</u> <code>{logger_failures}</code>\n"
+    "- <i>Last Failure:</i> <b>{last_failure}</b>\n\n"
+    "<b>Account Stats:</b>\n"
+    "- <i>Total Accounts:</i> <u>{total_accounts}</u>\n"
+    "- <b>Active Accounts:</b> <code>{active_accounts}</code> \n"
+    "- <u>Inactive Accounts:</u> <i>{inactive_accounts}</i> \n\n"
+    "<b>Current Delay:</b> <code>{ad_delay}s</code>"
+)
+DETAILED_REPORT_MARKUP = kb([[InlineKeyboardButton("x Back", callback_data="analytics")]])
+
+@lru_cache(maxsize=1)
+def report_date(day_ordinal):
+    """Date shown on the detailed report; keyed by date.today().toordinal() so it's formatted once a day"""
+    return date.fromordinal(day_ordinal).strftime('%d/%m/%y')
+
 @pyro.on_callback_query(filters.regex("detailed_report"))
 async def detailed_report_callback(client, callback_query):
     """Handle detailed report callback"""
@@ -5708,31 +5945,26 @@ async def detailed_report_callback(client, callback_query):
         uid = callback_query.from_user.id
         user_stats = db.get_user_analytics(uid)
         accounts = db.get_user_accounts(uid)
-        logger_failures = db.get_logger_failures(uid)
-        
-        detailed_text = (
-            f"<b>DETAILED ANALYTICS REPORT:</b>\n\n"
-            f"<u>Date:</u> <i>{datetime.now().strftime('%d/%m/%y')}</i>\n"
-            f"<b>User ID:</b> <code>{uid}</code>\n\n"
-            "<b>Broadcast Stats:</b>\n"
-            f"- <u>Total Sent:</u> <code>{user_stats.get('total_sent', 0)}</code>\n"
-            f"- <i>Total Failed:</i> <b>{user_stats.get('total_failed', 0)}</b>\n"
-            f"- <u>Total Broadcasts:</u> <code>{user_stats.get('total_broadcasts', 0)}</code>\n\n"
-            "<b>Logger Stats:</b>\n"
-            f"- <u>Logger Failures:</u> <code>{len(logger_failures)}</code>\n"
-            f"- <i>Last Failure:</i> <b>{logger_failures[-1]['error'] if logger_failures else 'None'}</b>\n\n"
-            "<b>Account Stats:</b>\n"
-            f"- <i>Total Accounts:</i> <u>{len(accounts)}</u>\n"
-            f"- <b>Active Accounts:</b> <code>{len([a for a in accounts if a['is_active']])}</code> \n"
-            f"- <u>Inactive Accounts:</u> <i>{len([a for a in accounts if not a['is_active']])}</i> \n\n"
-            f"<b>Current Delay:</b> <code>{db.get_user_ad_delay(uid)}s</code>"
-        )
+        logger_failures = db.get_logger_failure_summary(uid)
+        
+        active_accounts = sum(1 for a in accounts if a['is_active'])
+        detailed_text = DETAILED_REPORT_TEMPLATE.format_map({
+            "date": report_date(date.today().toordinal()),
+            "uid": uid,
+            "total_sent": user_stats.get('total_sent', 0),
+            "total_failed": user_stats.get('total_failed', 0),
+            "total_broadcasts": user_stats.get('total_broadcasts', 0),
+            "logger_failures": logger_failures["count"],
+            "last_failure": logger_failures["last_error"] or 'None',
+            "total_accounts": len(accounts),
+            "active_accounts": active_accounts,
+            "inactive_accounts": len(accounts) - active_accounts,
+            "ad_delay": db.get_user_ad_delay(uid)
+        })
         
         await callback_query.message.edit_caption(
             caption=detailed_text,
-            reply_markup=kb([
-                [InlineKeyboardButton("x Back", callback_data="analytics")]
-            ]),
+            reply_markup=DETAILED_REPORT_MARKUP,
             parse_mode=ParseMode.HTML
         )
         logger.info(f"Detailed report shown for user {uid}")
@@ -5921,22 +6153,7 @@ async def handle_text_message(client, message):
             all_groups = []
             
             if accounts:
-                for acc in accounts:
-                    try:
-                        tg_client = await get_telegram_client(acc["phone_number"], acc["session_string"])
-                        async for dialog in tg_client.iter_dialogs():
-                            if dialog.is_group or dialog.is_channel:
-                                entity = dialog.entity
-                                group_data = {
-                                    "id": entity.id,
-                                    "title": dialog.title,
-                                    "is_forum": getattr(entity, 'forum', False)
-                                }
-                                all_groups.append(group_data)
-                        break  # Use first account only
-                    except Exception as e:
-                        logger.error(f"Error fetching groups for search: {e}")
-                        continue
+                all_groups = await fetch_user_dialog_groups(uid, accounts)
             
             filtered_groups = filter_groups_by_keyword(all_groups, search_keyword)
             
@@ -5950,7 +6167,7 @@ async def handle_text_message(client, message):
             )
             return
         
-        user = db.db.users.find_one({"user_id": uid})
+        user = db.get_user(uid, ("waiting_for_schedule_start", "waiting_for_schedule_end"))
         
         if user:
             if user.get("waiting_for_schedule_start"):
@@ -6211,7 +6428,7 @@ async def handle_text_message(client, message):
                         f"<b> Invalid interval!</b>\n\n"
                         f"Maximum interval is 86400 seconds (24 hours).\nPlease enter a valid number",
                         parse_mode=ParseMode.HTML,
-                        reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                        reply_markup=BACK_TO_MAIN_MARKUP
                     )
                     return
 
@@ -6233,7 +6450,7 @@ async def handle_text_message(client, message):
                     f"<b> Invalid input!</b>\n\n"
                     f"<u>Please enter a number (in seconds).</u>\n<i>Example: <code>300</code> for 5 minutes.</i>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
             except Exception as e:
                 logger.error(f" Failed to set broadcast delay for {uid}: {e}")
@@ -6243,7 +6460,7 @@ async def handle_text_message(client, message):
                     f"<u>Error:</u> <i>{str(e)}</i>\n"
                     f"<b>Contact:</b> <code>@{config.ADMIN_USERNAME}</code>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
         
         elif state == "waiting_saved_messages_count":
@@ -6314,7 +6531,7 @@ async def handle_text_message(client, message):
                     f"Now please enter your <b>API Hash</b>:\n\n"
                     f" <b>Example:</b> <code>abcd1234efgh5678...</code>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 return
             except ValueError:
@@ -6323,7 +6540,7 @@ async def handle_text_message(client, message):
                     f"Please enter a valid numeric API ID.\n\n"
                     f" <b>Example:</b> <code>12345678</code>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 return
 
@@ -6336,7 +6553,7 @@ async def handle_text_message(client, message):
                     f"API Hash should be longer than 10 characters.\n\n"
                     f" <b>Example:</b> <code>abcd1234efgh5678ijkl9012</code>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 return
             
@@ -6346,7 +6563,7 @@ async def handle_text_message(client, message):
                     f" <b>Session expired!</b>\n\n"
                     f"Please start the account addition process again.",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 return
             
@@ -6358,7 +6575,7 @@ async def handle_text_message(client, message):
                 f"Now please enter your <b>phone number</b> with country code:\n\n"
                 f" <b>Example:</b> <code>+1234567890</code>",
                 parse_mode=ParseMode.HTML,
-                reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                reply_markup=BACK_TO_MAIN_MARKUP
             )
             return
 
@@ -6370,7 +6587,7 @@ async def handle_text_message(client, message):
                     f"<u>Please use international format.</u>\n"
                     f"<i>Example: <code>+1234567890</code></i>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 return
                 
@@ -6389,7 +6606,7 @@ async def handle_text_message(client, message):
                         f" <b>API credentials not found!</b>\n\n"
                         f"Please restart the account addition process.",
                         parse_mode=ParseMode.HTML,
-                        reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                        reply_markup=BACK_TO_MAIN_MARKUP
                     )
                     return
                 
@@ -6451,7 +6668,7 @@ async def handle_text_message(client, message):
                     f"<b> Invalid phone number! </b>\n\n"
                     f"<u>Please check the number and try again.</u>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
             except Exception as e:
                 logger.error(f"Failed to send OTP for {uid}: {e}")
@@ -6460,7 +6677,7 @@ async def handle_text_message(client, message):
                     f"<b> Failed to send OTP!</b>\n\n"
                     f"<u>Error:</u> <i>{str(e)}</i>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 await send_dm_log(uid, f"<b> Failed to send OTP for phone:</b> {str(e)}")
             finally:
@@ -6478,7 +6695,7 @@ async def handle_text_message(client, message):
                     f"<b> Session expired!</b>\n\n"
                     f"<u>Please restart the process.</u>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 db.set_user_state(uid, "")
                 return
@@ -6494,7 +6711,7 @@ async def handle_text_message(client, message):
                     f"<b> Corrupted session data!</b>\n\n"
                     f"<b>Please restart the process.</b>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 db.set_user_state(uid, "")
                 db.delete_temp_data(uid, "session")
@@ -6507,7 +6724,7 @@ async def handle_text_message(client, message):
                     f" <b>API credentials not found!</b>\n\n"
                     f"Please restart the account addition process.",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
                 return
             
@@ -6540,7 +6757,7 @@ async def handle_text_message(client, message):
                     f"<b> Invalid password!</b>\n\n"
                     f"<u>Please try again.</u>",
                     parse_mode=ParseMode.HTML,
-                    reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]])
+                    reply_markup=BACK_TO_MAIN_MARKUP
                 )
             except Exception as e:
                 logger.error(f"Failed to sign in with password for {uid}: {e}")
@@ -6575,14 +6792,12 @@ async def handle_text_message(client, message):
 #  CYCLE TIMEOUT HANDLERS
 # =======================================================
 
-@pyro.on_callback_query(filters.regex("^set_cycle_timeout$"))
+@pyro.on_callback_query(callback_data_filter("set_cycle_timeout"))
 async def set_cycle_timeout_callback(client, callback_query):
     """Handle cycle timeout setting callback"""
     try:
         uid = callback_query.from_user.id
-        user = db.get_user(uid)
-        
-        current_timeout = db.get_user_cycle_timeout(uid) if hasattr(db, 'get_user_cycle_timeout') else 600
+        current_timeout = db.get_user_cycle_timeout(uid)
         
         await callback_query.message.edit_caption(
             caption=f"""<b> BROADCAST CYCLE TIMEOUT</b>\n\n"""
@@ -6609,14 +6824,13 @@ async def set_specific_timeout_callback(client, callback_query):
         uid = callback_query.from_user.id
         timeout = int(callback_query.data.split("_")[-1])
         
-        if hasattr(db, 'set_user_cycle_timeout'):
-            db.set_user_cycle_timeout(uid, timeout)
+        db.set_user_cycle_timeout(uid, timeout)
         
         await callback_query.message.edit_caption(
             caption=f"""<b> CYCLE TIMEOUT UPDATED!</b>\n\n"""
                     f"<b>New Timeout:</b> {timeout//60} minutes\n\n"
                     f"<i>Your broadcast will now pause for {timeout//60} minutes after every 5 cycles.</i>",
-            reply_markup=kb([[InlineKeyboardButton("←", callback_data="menu_main")]]),
+            reply_markup=BACK_TO_MAIN_MARKUP,
             parse_mode=ParseMode.HTML
         )
         
@@ -6630,13 +6844,13 @@ async def set_specific_timeout_callback(client, callback_query):
 #  SCHEDULED ADS HANDLERS
 # =======================================================
 
-@pyro.on_callback_query(filters.regex("^scheduled_ads$"))
+@pyro.on_callback_query(callback_data_filter("scheduled_ads"))
 async def scheduled_ads_callback(client, callback_query):
     """Handle scheduled ads menu"""
     try:
         uid = callback_query.from_user.id
         
-        user = db.db.users.find_one({"user_id": uid})
+        user = db.get_user(uid, SCHEDULE_FIELDS)
         schedule_enabled = user.get("schedule_enabled", False) if user else False
         schedule_start = user.get("schedule_start_time", "8:00 AM") if user else "8:00 AM"
         schedule_end = user.get("schedule_end_time", "8:00 PM") if user else "8:00 PM"
@@ -6683,20 +6897,13 @@ async def scheduled_ads_callback(client, callback_query):
         logger.error(f"Error in scheduled_ads: {e}")
         await callback_query.answer("Error occurred. Try again.", show_alert=True)
 
-@pyro.on_callback_query(filters.regex("^toggle_schedule$"))
+@pyro.on_callback_query(callback_data_filter("toggle_schedule"))
 async def toggle_schedule_callback(client, callback_query):
     """Toggle schedule on/off"""
     try:
         uid = callback_query.from_user.id
         
-        user = db.db.users.find_one({"user_id": uid})
-        current_status = user.get("schedule_enabled", False) if user else False
-        new_status = not current_status
-        
-        db.db.users.update_one(
-            {"user_id": uid},
-            {"$set": {"schedule_enabled": new_status}}
-        )
+        new_status = db.toggle_user_flag(uid, "schedule_enabled")
         
         status_text = "ENABLED " if new_status else "DISABLED "
         await callback_query.answer(f"Schedule {status_text}", show_alert=True)
@@ -6787,8 +6994,11 @@ async def start_bot_and_cleanup():
         except Exception as e:
             logger.error(f"Failed to stop running broadcasts: {e}")
 
+        client_eviction_task = asyncio.create_task(evict_idle_telegram_clients())
+
         logger.info(" All systems ready! Bot is now operational.")
         await idle()
+        client_eviction_task.cancel()
 
     except Exception as e:
         logger.error(f" Failed to start bot: {e}")
@@ -6801,6 +7011,8 @@ async def start_bot_and_cleanup():
             except Exception as cancel_err:
                 logger.warning(f"Failed to cancel task for {uid}: {cancel_err}")
 
+        await disconnect_telegram_clients()
+
         if db is not None and hasattr(db, 'close'):
             db.close()
             logger.info("Database connection closed")